@@ -1,13 +1,17 @@
 import abc
 import math
 import os
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, List, Optional
 from typing_extensions import Literal
 
+from cowbird.handlers.handler_factory import HandlerFactory
 from cowbird.permissions_synchronizer import Permission
 from cowbird.typedefs import JSON, SettingsType
 from cowbird.utils import get_logger, get_ssl_verify, get_timeout
 
+if TYPE_CHECKING:
+    from cowbird.handlers.impl.magpie import Magpie as MagpieHandler
+
 AnyHandlerParameter = Literal["priority", "url", "workspace_dir"]
 
 HANDLER_PRIORITY_PARAM: AnyHandlerParameter = "priority"
@@ -34,6 +38,7 @@ class Handler(abc.ABC):
                  "name",
                  "ssl_verify",
                  "timeout",
+                 "_magpie_handler",
                  HANDLER_PRIORITY_PARAM,
                  HANDLER_URL_PARAM,
                  HANDLER_WORKSPACE_DIR_PARAM
@@ -71,6 +76,7 @@ class Handler(abc.ABC):
         # Handlers making outbound requests should use these settings to avoid SSLError on test/dev setup
         self.ssl_verify = get_ssl_verify(self.settings)
         self.timeout = get_timeout(self.settings)
+        self._magpie_handler: Optional["MagpieHandler"] = None
         for required_param in self.required_params:  # pylint: disable=E1101,no-member
             if required_param not in HANDLER_PARAMETERS:
                 raise HandlerConfigurationException(f"Invalid handler parameter : {required_param}")
@@ -80,6 +86,17 @@ class Handler(abc.ABC):
                 LOGGER.error(error_msg)
                 raise HandlerConfigurationException(error_msg)
 
+    @property
+    def magpie_handler(self) -> "MagpieHandler":
+        """
+        Magpie handler used by the handlers that synchronize their resources or permissions with Magpie.
+
+        The handler is retrieved once from the :class:`HandlerFactory`, instead of on each operation.
+        """
+        if self._magpie_handler is None:
+            self._magpie_handler = HandlerFactory().get_handler("Magpie")
+        return self._magpie_handler
+
     def json(self) -> JSON:
         return {"name": self.name}
 
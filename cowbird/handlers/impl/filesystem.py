@@ -1,8 +1,12 @@
+import functools
 import os
 import re
 import shutil
-from pathlib import Path
-from typing import Any, List, Tuple, cast
+import stat
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, cast
 
 from magpie.permissions import Access
 from magpie.permissions import Permission as MagpiePermission
@@ -24,6 +28,18 @@ DEFAULT_WPS_OUTPUTS_RES_NAME = "wps_outputs"
 DEFAULT_SECURE_DATA_PROXY_NAME = "secure-data-proxy"
 DEFAULT_USER_WPS_OUTPUTS_DIR_NAME = "wps_outputs"
 
+# Duration (in seconds) for which a user name resolved from its id is reused by the WPS outputs events
+USER_NAME_CACHE_TIMEOUT = 300
+
+# Name of a 'bird' service directory in the WPS outputs directory, only made of word characters
+BIRD_NAME_REGEX = re.compile(r"\w+")
+
+# Suffix of the temporary paths used to replace existing links atomically
+TMP_LINK_SUFFIX = ".cowbird-tmp"
+
+# Hardlink operations are bound by filesystem syscalls and Magpie requests, which both release the GIL.
+HARDLINK_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
 
 class FileSystem(Handler, FSMonitor):
     """
@@ -66,16 +82,20 @@ class FileSystem(Handler, FSMonitor):
         self.jupyterhub_user_data_dir = jupyterhub_user_data_dir
         self.secure_data_proxy_name = secure_data_proxy_name
         self.wps_outputs_res_name = wps_outputs_res_name
-        # Make sure output path is normalized for the regex (e.g.: removing trailing slashes)
+        # Make sure output path is normalized for the path parsing (e.g.: removing trailing slashes)
         self.wps_outputs_dir = os.path.normpath(wps_outputs_dir)
         self.notebooks_dir_name = notebooks_dir_name
         self.public_workspace_wps_outputs_subpath = public_workspace_wps_outputs_subpath
         self.user_wps_outputs_dir_name = user_wps_outputs_dir_name
 
-        # Regex to find any directory or file found in the `users` output path of a 'bird' service
-        # {self.wps_outputs_dir}/<wps-bird-name>/users/<user-uuid>/...
-        self.wps_outputs_user_data_regex = re.compile(
-            rf"^{self.wps_outputs_dir}/(?P<bird_name>\w+)/users/(?P<user_id>\d+)/(?P<subpath>.+)")
+        # Prefix of any path found in the WPS outputs directory, used to parse the paths with plain string operations.
+        self._wps_outputs_prefix = self.wps_outputs_dir + os.sep
+        # Workspace paths, computed once since they only depend on the handler configuration and the user name.
+        self._public_workspace_wps_outputs_dir: Optional[str] = None
+        self._user_workspace_dirs: Dict[str, str] = {}
+        self._user_workspace_wps_outputs_dirs: Dict[str, str] = {}
+        # User names indexed by user id, with the time at which they were resolved from Magpie.
+        self._user_names: Dict[int, Tuple[float, str]] = {}
 
     def start_wps_outputs_monitoring(self, monitoring: Monitoring) -> None:
         if not os.path.exists(self.wps_outputs_dir):
@@ -85,60 +105,170 @@ class FileSystem(Handler, FSMonitor):
         monitoring.register(self.wps_outputs_dir, True, self)
 
     def get_user_workspace_dir(self, user_name: str) -> str:
-        return os.path.join(self.workspace_dir, user_name)
+        try:
+            return self._user_workspace_dirs[user_name]
+        except KeyError:
+            user_workspace_dir = os.path.join(self.workspace_dir, user_name)
+            self._user_workspace_dirs[user_name] = user_workspace_dir
+            return user_workspace_dir
 
     def get_user_workspace_wps_outputs_dir(self, user_name: str) -> str:
-        return os.path.join(self.get_user_workspace_dir(user_name), self.user_wps_outputs_dir_name)
+        try:
+            return self._user_workspace_wps_outputs_dirs[user_name]
+        except KeyError:
+            user_wps_outputs_dir = os.path.join(self.get_user_workspace_dir(user_name), self.user_wps_outputs_dir_name)
+            self._user_workspace_wps_outputs_dirs[user_name] = user_wps_outputs_dir
+            return user_wps_outputs_dir
 
     def get_public_workspace_wps_outputs_dir(self) -> str:
-        return os.path.join(self.workspace_dir, self.public_workspace_wps_outputs_subpath)
+        if self._public_workspace_wps_outputs_dir is None:
+            self._public_workspace_wps_outputs_dir = os.path.join(self.workspace_dir,
+                                                                  self.public_workspace_wps_outputs_subpath)
+        return self._public_workspace_wps_outputs_dir
 
     def _get_jupyterhub_user_data_dir(self, user_name: str) -> str:
         return os.path.join(self.jupyterhub_user_data_dir, user_name)
 
+    @staticmethod
+    def _replace_with_link(create_link: Callable[[str], None], dst: str) -> None:
+        """
+        Replaces an existing destination path with a new link, atomically.
+
+        The link is first created at a temporary path by the input function, and then renamed to the destination path,
+        which avoids any moment where the destination path does not exist.
+        """
+        tmp_path = dst + TMP_LINK_SUFFIX
+        try:
+            create_link(tmp_path)
+        except FileExistsError:
+            # Leftover temporary path from a previously interrupted operation
+            os.remove(tmp_path)
+            create_link(tmp_path)
+        try:
+            os.replace(tmp_path, dst)
+        finally:
+            # The temporary path is left untouched if the rename failed, or if both paths were already hardlinks of the
+            # same file, in which case the rename does nothing.
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+
     @staticmethod
     def _create_symlink_dir(src: str, dst: str) -> None:
-        create_symlink = False
+        # Check if creating a new symlink is required, using a single `lstat` call to validate the destination path
+        try:
+            dst_stat = os.lstat(dst)
+        except FileNotFoundError:
+            os.symlink(src, dst, target_is_directory=True)
+            return
 
-        # Check if creating a new symlink is required
-        if not os.path.islink(dst):
-            if not os.path.exists(dst):
-                create_symlink = True
-            else:
-                raise FileExistsError("Failed to create symlinked directory, since a non-symlink directory already "
-                                      f"exists at the targeted path [{dst}].")
-        elif os.readlink(dst) != src:
+        if not stat.S_ISLNK(dst_stat.st_mode):
+            raise FileExistsError("Failed to create symlinked directory, since a non-symlink directory already "
+                                  f"exists at the targeted path [{dst}].")
+        if os.readlink(dst) != src:
             # If symlink already exists but points to the wrong source, update symlink to the new source directory.
-            os.remove(dst)
-            create_symlink = True
+            FileSystem._replace_with_link(lambda path: os.symlink(src, path, target_is_directory=True), dst)
 
-        if create_symlink:
-            os.symlink(src, dst, target_is_directory=True)
+    def _parse_user_path(self, path: str) -> Optional[Tuple[str, str, str]]:
+        """
+        Parses a path found in the `users` output path of a 'bird' service.
+
+        User data paths are of the form ``{wps_outputs_dir}/<bird-name>/users/<user-id>/<subpath>``, where the bird name
+        only contains word characters (see :data:`BIRD_NAME_REGEX`) and the user id only contains digits. This method is
+        the single definition of that format, and splits the path with plain string operations, which are much faster
+        than a regex on the whole path for the number of paths processed when browsing the WPS outputs directory.
+
+        Returns the bird name, the user id and the subpath found in the path, or ``None`` if the path is not user data.
+        """
+        if not path.startswith(self._wps_outputs_prefix):
+            return None
+        parts = path[len(self._wps_outputs_prefix):].split("/", 3)
+        if (len(parts) < 4 or parts[1] != "users" or not parts[2].isdecimal() or not parts[3]
+                or not BIRD_NAME_REGEX.fullmatch(parts[0])):
+            return None
+        bird_name, _, user_id, subpath = parts
+        return bird_name, user_id, subpath
+
+    @staticmethod
+    def _iter_wps_outputs_files(root: str) -> Iterator[str]:
+        """
+        Yields the path of every file found under the root directory.
+
+        Equivalent to the files found with :func:`os.walk` (symlinked directories are not browsed and unreadable
+        directories are ignored), but uses the entries cached by :func:`os.scandir` to avoid additional ``stat`` calls
+        and path joins for each file.
+        """
+        dirs_to_browse = [root]
+        while dirs_to_browse:
+            try:
+                with os.scandir(dirs_to_browse.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs_to_browse.append(entry.path)
+                        elif not entry.is_dir():
+                            yield entry.path
+            except OSError:
+                continue
+
+    def _iter_user_wps_outputs_files(self, route: str, user_ids: Iterable[str]) -> Iterator[str]:
+        """
+        Yields the path of the files found under a WPS outputs directory that could be user data of the given users.
+
+        Only the ``<bird>/users/<user_id>`` subdirectories of the given users are browsed when the route is above them,
+        instead of browsing the data of every user and the public data. Paths must still be validated with
+        :meth:`_parse_user_path`.
+        """
+        route_parts = route[len(self.wps_outputs_dir):].strip("/").split("/") if route != self.wps_outputs_dir else []
+        if len(route_parts) == 0:  # WPS outputs directory, containing the bird directories
+            try:
+                with os.scandir(route) as entries:
+                    bird_dirs = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                return
+            users_dirs = [os.path.join(bird_dir, "users") for bird_dir in bird_dirs]
+        elif len(route_parts) == 1:  # bird directory
+            users_dirs = [os.path.join(route, "users")]
+        elif len(route_parts) == 2 and route_parts[1] == "users":
+            users_dirs = [route]
+        else:  # the route is already specific to a user, or is not a user data directory
+            yield from self._iter_wps_outputs_files(route)
+            return
+        for users_dir in users_dirs:
+            for user_id in user_ids:
+                yield from self._iter_wps_outputs_files(os.path.join(users_dir, user_id))
 
     def user_created(self, user_name: str) -> None:
         user_workspace_dir = self.get_user_workspace_dir(user_name)
         try:
             os.mkdir(user_workspace_dir)
         except FileExistsError:
-            LOGGER.info("User workspace directory already exists (skip creation): [%s]", user_workspace_dir)
+            LOGGER.debug("User workspace directory already exists (skip creation): [%s]", user_workspace_dir)
         os.chmod(user_workspace_dir, 0o755)  # nosec
 
         FileSystem._create_symlink_dir(src=self._get_jupyterhub_user_data_dir(user_name),
                                        dst=os.path.join(user_workspace_dir, self.notebooks_dir_name))
 
         # Create all hardlinks from the user wps outputs data
-        for root, _, filenames in os.walk(self.wps_outputs_dir):
-            for file in filenames:
-                full_path = os.path.join(root, file)
-                self._create_wps_outputs_hardlink(src_path=full_path, overwrite=True,
-                                                  process_user_files=True, process_public_files=False)
+        # User names are cached for the duration of the operation, to request Magpie once instead of once per file.
+        self._create_wps_outputs_hardlinks(self._iter_wps_outputs_files(self.wps_outputs_dir), overwrite=True,
+                                           process_user_files=True, process_public_files=False,
+                                           user_name_cache={})
 
     def user_deleted(self, user_name: str) -> None:
+        # Forget the id of the deleted user, to avoid resolving it to an obsolete name
+        for user_id, (_, cached_user_name) in list(self._user_names.items()):
+            if cached_user_name == user_name:
+                del self._user_names[user_id]
+
         user_workspace_dir = self.get_user_workspace_dir(user_name)
+        # Forget the workspace paths of the deleted user, to keep the cached paths limited to the existing users
+        self._user_workspace_dirs.pop(user_name, None)
+        self._user_workspace_wps_outputs_dirs.pop(user_name, None)
         try:
             shutil.rmtree(user_workspace_dir)
         except FileNotFoundError:
-            LOGGER.info("User workspace directory not found (skip removal): [%s]", user_workspace_dir)
+            LOGGER.debug("User workspace directory not found (skip removal): [%s]", user_workspace_dir)
 
     @staticmethod
     def get_instance() -> "FileSystem":
@@ -148,67 +278,120 @@ class FileSystem(Handler, FSMonitor):
         return HandlerFactory().get_handler("FileSystem")
 
     def _get_public_hardlink(self, src_path: str) -> str:
-        subpath = os.path.relpath(src_path, self.wps_outputs_dir)
-        return os.path.join(self.get_public_workspace_wps_outputs_dir(), subpath)
+        # The source path is always found under the WPS outputs directory, so its subpath is sliced directly instead of
+        # being resolved with `os.path.relpath`, and the paths are joined in a single string format.
+        return f"{self.get_public_workspace_wps_outputs_dir()}/{src_path[len(self._wps_outputs_prefix):]}"
 
     def get_user_hardlink(self, src_path: str, bird_name: str, user_name: str, subpath: str) -> str:
         user_workspace_dir = self.get_user_workspace_dir(user_name)
         if not os.path.exists(user_workspace_dir):
             raise FileNotFoundError(f"User `{user_name}` workspace not found at path [{user_workspace_dir}]. Failed to "
                                     f"find a hardlink path for the wpsoutput [{src_path}] source path.")
-        subpath = os.path.join(bird_name, subpath)
-        return os.path.join(self.get_user_workspace_wps_outputs_dir(user_name), subpath)
+        return self._get_user_hardlink_no_check(bird_name=bird_name, user_name=user_name, subpath=subpath)
 
-    def _get_secure_data_proxy_file_perms(self, src_path: str, user_name: str) -> Tuple[bool, bool]:
+    def _get_user_hardlink_no_check(self, bird_name: str, user_name: str, subpath: str) -> str:
+        """
+        Builds the hardlink path of a user WPS outputs file, without validating that the user workspace exists.
+        """
+        return f"{self.get_user_workspace_wps_outputs_dir(user_name)}/{bird_name}/{subpath}"
+
+    @staticmethod
+    def _get_children_by_name(resource: JSON, children_cache: Dict[int, Dict[str, JSON]]) -> Dict[str, JSON]:
+        """
+        Returns the children of a Magpie resource, indexed by resource name.
+
+        The index is kept in the cache by resource id, to be reused by any following lookup of the same operation,
+        without modifying the resource tree shared by the different files.
+        """
+        resource_id = cast(int, resource["resource_id"])
+        children = children_cache.get(resource_id)
+        if children is None:
+            children = {child["resource_name"]: child for child in resource["children"].values()}
+            children_cache[resource_id] = children
+        return children
+
+    def _get_secure_data_proxy_resource(self) -> JSON:
+        """
+        Gets the resource tree of the `secure-data-proxy` service from Magpie.
+        """
+        sdp_svc_info = self.magpie_handler.get_service_info(self.secure_data_proxy_name)
+        return self.magpie_handler.get_resource(cast(int, sdp_svc_info["resource_id"]))
+
+    def _get_secure_data_proxy_file_perms(self,
+                                          src_path: str,
+                                          user_name: str,
+                                          sdp_resource: Optional[JSON] = None,
+                                          perms_cache: Optional[Dict[Tuple[str, int], Tuple[bool, bool]]] = None,
+                                          children_cache: Optional[Dict[int, Dict[str, JSON]]] = None,
+                                          ) -> Tuple[bool, bool]:
         """
         Finds a route from the `secure-data-proxy` service that matches the resource path (or one of its parent
         resource) and gets the user permissions on that route.
+
+        :param src_path: Path of the WPS outputs file.
+        :param user_name: Name of the user for which to resolve the permissions.
+        :param sdp_resource: Resource tree of the `secure-data-proxy` service. Retrieved from Magpie if not provided.
+        :param perms_cache: Cache of the permissions resolved by user and route resource id. If provided, it is used
+                            and updated to avoid requesting Magpie again for other files found under the same route.
+        :param children_cache: Cache of the resource children indexed by name, by resource id. If provided, it is used
+                               and updated to avoid indexing the same resources again for other files.
         """
-        magpie_handler = HandlerFactory().get_handler("Magpie")
-        sdp_svc_info = magpie_handler.get_service_info(self.secure_data_proxy_name)
+        if sdp_resource is None:
+            sdp_resource = self._get_secure_data_proxy_resource()
+        if children_cache is None:
+            children_cache = {}
         # Find the closest related route resource
-        expected_route = re.sub(rf"^{self.wps_outputs_dir}", self.wps_outputs_res_name, src_path)
+        # The source path is always found under the WPS outputs directory, which is replaced by the resource name.
+        expected_route = self.wps_outputs_res_name + src_path[len(self.wps_outputs_dir):]
 
         # Finds the resource id of the route or the closest matching parent route.
         closest_res_id = None
-        resource = magpie_handler.get_resource(cast(int, sdp_svc_info["resource_id"]))
+        resource = sdp_resource
         for segment in expected_route.split("/"):
-            child_res_id = None
-            for child in resource["children"].values():
-                if child["resource_name"] == segment:
-                    child_res_id = cast(int, child["resource_id"])
-                    resource = child
-                    break
-            if not child_res_id:
+            child = self._get_children_by_name(resource, children_cache).get(segment)
+            if not child:
                 break
-            closest_res_id = child_res_id
+            resource = child
+            closest_res_id = cast(int, child["resource_id"])
 
         if not closest_res_id:
             # No resource corresponds to the expected route or one of its parent route.
             # Assume access is not allowed.
-            is_readable = False
-            is_writable = False
-        else:
-            # Resolve permissions
-            res_perms = magpie_handler.get_user_permissions_by_res_id(user=user_name,
-                                                                      res_id=closest_res_id,
-                                                                      effective=True)["permissions"]
-            read_access = [perm["access"] for perm in res_perms
-                           if perm["name"] == MagpiePermission.READ.value][0]
-            write_access = [perm["access"] for perm in res_perms
-                            if perm["name"] == MagpiePermission.WRITE.value][0]
-            is_readable = read_access == Access.ALLOW.value
-            is_writable = write_access == Access.ALLOW.value
-        return is_readable, is_writable
-
-    def update_secure_data_proxy_path_perms(self, src_path: str, user_name: str) -> bool:
+            return False, False
+        if perms_cache is not None and (user_name, closest_res_id) in perms_cache:
+            return perms_cache[(user_name, closest_res_id)]
+
+        # Resolve permissions
+        res_perms = self.magpie_handler.get_user_permissions_by_res_id(
+            user=user_name, res_id=closest_res_id, effective=True)["permissions"]
+        perms_access = {perm["name"]: perm["access"] for perm in res_perms}
+        file_perms = (perms_access.get(MagpiePermission.READ.value) == Access.ALLOW.value,
+                      perms_access.get(MagpiePermission.WRITE.value) == Access.ALLOW.value)
+        if perms_cache is not None:
+            perms_cache[(user_name, closest_res_id)] = file_perms
+        return file_perms
+
+    def update_secure_data_proxy_path_perms(self,
+                                            src_path: str,
+                                            user_name: str,
+                                            sdp_resource: Optional[JSON] = None,
+                                            perms_cache: Optional[Dict[Tuple[str, int], Tuple[bool, bool]]] = None,
+                                            children_cache: Optional[Dict[int, Dict[str, JSON]]] = None,
+                                            ) -> bool:
         """
         Gets a path's permissions from the `secure-data-proxy` service and updates the file system permissions
         accordingly.
 
         Returns a boolean to indicate if the user should have some type of access to the path or not.
+
+        .. seealso::
+            :meth:`_get_secure_data_proxy_file_perms` for the optional ``sdp_resource``, ``perms_cache`` and
+            ``children_cache`` parameters.
         """
-        is_readable, is_writable = self._get_secure_data_proxy_file_perms(src_path, user_name)
+        is_readable, is_writable = self._get_secure_data_proxy_file_perms(src_path, user_name,
+                                                                          sdp_resource=sdp_resource,
+                                                                          perms_cache=perms_cache,
+                                                                          children_cache=children_cache)
 
         if is_writable:
             LOGGER.warning("Found enabled `write` permissions from the `%s` service for the path `%s` and user `%s`. "
@@ -223,64 +406,257 @@ class FileSystem(Handler, FSMonitor):
         return is_readable
 
     @staticmethod
-    def create_hardlink_path(src_path: str, hardlink_path: str, access_allowed: bool) -> None:
+    def create_hardlink_path(src_path: str, hardlink_path: str, access_allowed: bool, overwrite: bool = False,
+                             created_dirs: Optional[Set[str]] = None) -> bool:
         """
         Creates a hardlink path from a source file, if the user has access rights.
+
+        Returns a bool to indicate if the hardlink path was created or kept for the source file.
+
+        An existing path at the hardlink location is replaced if ``overwrite`` is enabled, and is always removed if the
+        user does not have access rights. The link is attempted directly, and the existing path is only handled when
+        the link fails, to avoid checking the hardlink path beforehand.
+
+        If provided, ``created_dirs`` is used and updated with the parent directories already created and set as
+        read-only, to prepare each directory only once for all the files of a bulk operation.
         """
         if access_allowed:
-            os.makedirs(os.path.dirname(hardlink_path), exist_ok=True)
-
-            # Set directories as read-only
-            apply_new_path_permissions(os.path.dirname(hardlink_path),
-                                       is_readable=True,
-                                       is_writable=False,
-                                       is_executable=True)
+            hardlink_dir = os.path.dirname(hardlink_path)
+            if created_dirs is None or hardlink_dir not in created_dirs:
+                os.makedirs(hardlink_dir, exist_ok=True)
+
+                # Set directories as read-only
+                apply_new_path_permissions(hardlink_dir,
+                                           is_readable=True,
+                                           is_writable=False,
+                                           is_executable=True)
+                if created_dirs is not None:
+                    created_dirs.add(hardlink_dir)
 
             LOGGER.debug("Creating hardlink from file `%s` to the path `%s`", src_path, hardlink_path)
             try:
-                os.link(src_path, hardlink_path)
+                try:
+                    os.link(src_path, hardlink_path)
+                except FileExistsError:
+                    if not overwrite:
+                        # Hardlink already exists, nothing to do.
+                        return True
+                    src_stat = os.stat(src_path)
+                    dst_stat = os.lstat(hardlink_path)
+                    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+                        # The existing path is already a hardlink of the source file, nothing to do.
+                        return True
+                    # Replace the existing file at the destination path to reset the hardlink path with the expected
+                    # source.
+                    LOGGER.warning("Replacing existing hardlink destination path at `%s` to generate hardlink for the "
+                                   "newly created file.", hardlink_path)
+                    FileSystem._replace_with_link(lambda path: os.link(src_path, path), hardlink_path)
             except Exception as exc:
                 LOGGER.warning("Failed to create hardlink `%s` : %s", hardlink_path, exc)
-        else:
-            LOGGER.info("Access to the WPS output file `%s` is not allowed for the user. No hardlink created.",
-                        src_path)
+                return False
+            return True
+        try:
+            os.remove(hardlink_path)
+            LOGGER.info("Removed existing hardlink destination path at `%s`.", hardlink_path)
+        except FileNotFoundError:
+            pass
+        LOGGER.info("Access to the WPS output file `%s` is not allowed for the user. No hardlink created.", src_path)
+        return False
+
+    def _resolve_user_name(self, user_id: int) -> str:
+        """
+        Finds the name of a user from its id, reusing the names resolved within the last
+        :data:`USER_NAME_CACHE_TIMEOUT` seconds to avoid requesting Magpie on each WPS outputs event.
+        """
+        cached_user_name = self._user_names.get(user_id)
+        if cached_user_name and time.time() - cached_user_name[0] <= USER_NAME_CACHE_TIMEOUT:
+            return cached_user_name[1]
+        user_name = self.magpie_handler.get_user_name_from_user_id(user_id)
+        self._user_names[user_id] = (time.time(), user_name)
+        return user_name
+
+    def _get_user_names_by_id(self) -> Dict[int, str]:
+        """
+        Gets the names of all users from Magpie with a single request, and refreshes the cached user names with them.
+        """
+        user_names = self.magpie_handler.get_user_names_by_id()
+        resolved_time = time.time()
+        self._user_names = {user_id: (resolved_time, user_name) for user_id, user_name in user_names.items()}
+        return user_names
+
+    def _get_user_name(self, user_id: int, user_name_cache: Optional[Dict[int, str]] = None) -> str:
+        """
+        Finds the name of a user from its id.
+
+        If provided, the cache is used and updated with the user names, to avoid requesting Magpie for each file of the
+        same user during a bulk operation.
+        """
+        if user_name_cache is None:
+            return self._resolve_user_name(user_id)
+        if user_id not in user_name_cache:
+            user_name_cache[user_id] = self._resolve_user_name(user_id)
+        return user_name_cache[user_id]
+
+    def _log_missing_secure_data_proxy(self) -> None:
+        LOGGER.warning("`%s` service not found. Considering user WPS outputs data as accessible (read-only) by "
+                       "default.", self.secure_data_proxy_name)
+
+    def _is_secure_data_proxy_available(self) -> bool:
+        """
+        Checks if the secure-data-proxy service, used to define the access to the user WPS outputs data, exists.
+        """
+        api_services = self.magpie_handler.get_services_by_type(ServiceAPI.service_type)
+        return self.secure_data_proxy_name in api_services
 
     def _create_wps_outputs_hardlink(self, src_path: str, overwrite: bool = False,
-                                     process_user_files: bool = True, process_public_files: bool = True) -> None:
-        regex_match = self.wps_outputs_user_data_regex.search(src_path)
+                                     process_user_files: bool = True, process_public_files: bool = True,
+                                     user_name_cache: Optional[Dict[int, str]] = None,
+                                     secure_data_proxy_available: Optional[bool] = None,
+                                     sdp_resource: Optional[JSON] = None,
+                                     perms_cache: Optional[Dict[Tuple[str, int], Tuple[bool, bool]]] = None,
+                                     children_cache: Optional[Dict[int, Dict[str, JSON]]] = None,
+                                     created_dirs: Optional[Set[str]] = None,
+                                     check_user_workspace: bool = True) -> Optional[str]:
+        """
+        Creates the hardlink of a WPS outputs file, according to the user access if it is a user file.
+
+        Returns the hardlink path if it was created or kept for the source file, or ``None`` otherwise.
+        The existence of the user workspace is only validated if ``check_user_workspace`` is enabled, which can be
+        disabled if the workspace was already validated for all the files of a bulk operation.
+        """
+        user_path_info = self._parse_user_path(src_path)
         access_allowed = True
-        if regex_match:  # user files
+        if user_path_info:  # user files
             if not process_user_files:
-                return
-
-            magpie_handler = HandlerFactory().get_handler("Magpie")
-            user_name = magpie_handler.get_user_name_from_user_id(int(regex_match.group("user_id")))
-            hardlink_path = self.get_user_hardlink(src_path=src_path,
-                                                   bird_name=regex_match.group("bird_name"),
-                                                   user_name=user_name,
-                                                   subpath=regex_match.group("subpath"))
-            api_services = magpie_handler.get_services_by_type(ServiceAPI.service_type)
-            if self.secure_data_proxy_name not in api_services:
-                LOGGER.warning("`%s` service not found. Considering user WPS outputs data as accessible (read-only) "
-                               "by default.", self.secure_data_proxy_name)
+                return None
+
+            bird_name, user_id, subpath = user_path_info
+            user_name = self._get_user_name(int(user_id), user_name_cache)
+            if check_user_workspace:
+                hardlink_path = self.get_user_hardlink(src_path=src_path,
+                                                       bird_name=bird_name,
+                                                       user_name=user_name,
+                                                       subpath=subpath)
+            else:
+                hardlink_path = self._get_user_hardlink_no_check(bird_name=bird_name,
+                                                                 user_name=user_name,
+                                                                 subpath=subpath)
+            if secure_data_proxy_available is None:
+                secure_data_proxy_available = self._is_secure_data_proxy_available()
+                if not secure_data_proxy_available:
+                    self._log_missing_secure_data_proxy()
+            if not secure_data_proxy_available:
                 apply_new_path_permissions(src_path, True, False, False)
             else:  # get access and apply permissions if the secure-data-proxy exists
-                access_allowed = self.update_secure_data_proxy_path_perms(src_path, user_name)
+                access_allowed = self.update_secure_data_proxy_path_perms(src_path, user_name,
+                                                                          sdp_resource=sdp_resource,
+                                                                          perms_cache=perms_cache,
+                                                                          children_cache=children_cache)
         else:  # public files
             if not process_public_files:
-                return
+                return None
             hardlink_path = self._get_public_hardlink(src_path)
 
-        if os.path.exists(hardlink_path):
-            if not overwrite and access_allowed:
-                # Hardlink already exists, nothing to do.
-                return
-            # Delete the existing file at the destination path to reset the hardlink path with the expected source.
-            LOGGER.warning("Removing existing hardlink destination path at `%s` to generate hardlink for the newly "
-                           "created file.", hardlink_path)
-            os.remove(hardlink_path)
+        if self.create_hardlink_path(src_path, hardlink_path, access_allowed, overwrite=overwrite,
+                                     created_dirs=created_dirs):
+            return hardlink_path
+        return None
 
-        self.create_hardlink_path(src_path, hardlink_path, access_allowed)
+    def _create_wps_outputs_hardlinks(self, src_paths: Iterable[str], linked_paths: Optional[Set[str]] = None,
+                                      **kwargs: Any) -> None:
+        """
+        Creates the hardlinks of multiple WPS outputs files, processing the different source directories concurrently.
+
+        Files are grouped by directory, since the creation of links in a same directory is serialized by the
+        filesystem. Failures are logged without interrupting the processing of the other files, and are reported
+        together once all the files are processed.
+
+        :param src_paths: Paths of the WPS outputs files to process.
+        :param linked_paths: If provided, updated with the hardlink paths created or kept for their source file, even
+                             if the operation fails.
+        :param kwargs: Parameters passed down to :meth:`_create_wps_outputs_hardlink` for each file.
+        :raises FileSystemError: If the hardlink of any file could not be processed.
+        """
+        process_user_files = kwargs.get("process_user_files", True)
+        process_public_files = kwargs.get("process_public_files", True)
+        user_name_cache: Dict[int, str] = kwargs.setdefault("user_name_cache", {})
+        user_names_fetched = bool(user_name_cache)
+        # The users are resolved before processing the files concurrently, to skip the files of unknown users and of
+        # users without a workspace, with a single warning for each user instead of an error for each file.
+        # The user workspace is checked once per user, instead of being checked on the filesystem for each file.
+        user_workspace_exists: Dict[str, bool] = {}
+        skipped_users: Set[str] = set()
+        src_paths_by_dir: Dict[str, List[str]] = defaultdict(list)
+        has_user_files = False
+        for src_path in src_paths:
+            user_path_info = self._parse_user_path(src_path)
+            if user_path_info:
+                if not process_user_files:
+                    continue
+                if not user_names_fetched:
+                    # The names of all users are retrieved with a single request
+                    user_name_cache.update(self._get_user_names_by_id())
+                    user_names_fetched = True
+                user_id = user_path_info[1]
+                user_name = user_name_cache.get(int(user_id))
+                if user_name and user_name not in user_workspace_exists:
+                    user_workspace_exists[user_name] = os.path.exists(self.get_user_workspace_dir(user_name))
+                if not user_name or not user_workspace_exists[user_name]:
+                    if user_id not in skipped_users:
+                        skipped_users.add(user_id)
+                        LOGGER.warning("User with id `%s` not found, or without an existing workspace. The hardlinks "
+                                       "of the user WPS outputs files are not created.", user_id)
+                    continue
+                has_user_files = True
+            elif not process_public_files:
+                continue
+            src_paths_by_dir[os.path.dirname(src_path)].append(src_path)
+
+        def create_dir_hardlinks(dir_src_paths: List[str]) -> Tuple[int, List[str]]:
+            failed_count = 0
+            dir_linked_paths = []
+            for src_path in dir_src_paths:
+                try:
+                    hardlink_path = self._create_wps_outputs_hardlink(src_path=src_path, **kwargs)
+                except Exception as exc:
+                    LOGGER.error("Failed to create the hardlink of the WPS outputs file [%s].", src_path, exc_info=exc)
+                    failed_count += 1
+                else:
+                    if hardlink_path:
+                        dir_linked_paths.append(hardlink_path)
+            return failed_count, dir_linked_paths
+
+        if has_user_files and "secure_data_proxy_available" not in kwargs:
+            # The availability of the secure-data-proxy service is shared by all the files of the operation.
+            kwargs["secure_data_proxy_available"] = self._is_secure_data_proxy_available()
+            if not kwargs["secure_data_proxy_available"]:
+                # Logged once for the operation, instead of once for each user file.
+                self._log_missing_secure_data_proxy()
+        if kwargs.get("secure_data_proxy_available"):
+            # The secure-data-proxy resources and the resolved permissions are also shared by all the files.
+            if "sdp_resource" not in kwargs:
+                kwargs["sdp_resource"] = self._get_secure_data_proxy_resource()
+            kwargs.setdefault("perms_cache", {})
+            kwargs.setdefault("children_cache", {})
+        # The hardlink directories are created once for all the files of the operation.
+        kwargs.setdefault("created_dirs", set())
+        # The user workspaces were already validated for all the processed files.
+        kwargs["check_user_workspace"] = False
+        # The Magpie handler is signed in by the previous requests, before being shared by the different threads.
+        with ThreadPoolExecutor(max_workers=HARDLINK_MAX_WORKERS) as executor:
+            futures = [executor.submit(create_dir_hardlinks, dir_src_paths)
+                       for dir_src_paths in src_paths_by_dir.values()]
+            failed_count = 0
+            for future in as_completed(futures):
+                dir_failed_count, dir_linked_paths = future.result()
+                failed_count += dir_failed_count
+                if linked_paths is not None:
+                    linked_paths.update(dir_linked_paths)
+        src_count = sum(len(dir_src_paths) for dir_src_paths in src_paths_by_dir.values())
+        LOGGER.info("Processed the hardlinks of %s WPS outputs files (%s failed).", src_count, failed_count)
+        if failed_count:
+            raise FileSystemError(f"Failed to process the hardlinks of {failed_count} out of {src_count} WPS outputs "
+                                  "files. See the previous errors for more details.")
 
     def on_created(self, path: str) -> None:
         """
@@ -288,7 +664,8 @@ class FileSystem(Handler, FSMonitor):
 
         :param path: Absolute path of a new file/directory
         """
-        if not os.path.isdir(path) and Path(self.wps_outputs_dir) in Path(path).parents:
+        # Check the path prefix first, to ignore unrelated paths without any filesystem call
+        if path.startswith(self._wps_outputs_prefix) and not os.path.isdir(path):
             # Only process files, since hardlinks are not permitted on directories
             LOGGER.info("Creating hardlink for the new file path `%s`", path)
             self._create_wps_outputs_hardlink(src_path=path, overwrite=True)
@@ -307,23 +684,24 @@ class FileSystem(Handler, FSMonitor):
                        "handler.", path)
 
     def _delete_wps_outputs_hardlink(self, src_path: str,
-                                     process_user_paths: bool = True, process_public_paths: bool = True) -> bool:
+                                     process_user_paths: bool = True, process_public_paths: bool = True,
+                                     user_name_cache: Optional[Dict[int, str]] = None) -> bool:
         """
         Deletes the hardlink path that corresponds to the input source path.
 
         Returns a bool to indicate if a hardlink path was deleted or not.
         """
-        regex_match = self.wps_outputs_user_data_regex.search(src_path)
+        user_path_info = self._parse_user_path(src_path)
         try:
-            if regex_match:  # user paths
+            if user_path_info:  # user paths
                 if not process_user_paths:
                     return False
-                magpie_handler = HandlerFactory().get_handler("Magpie")
-                user_name = magpie_handler.get_user_name_from_user_id(int(regex_match.group("user_id")))
+                bird_name, user_id, subpath = user_path_info
+                user_name = self._get_user_name(int(user_id), user_name_cache)
                 linked_path = self.get_user_hardlink(src_path=src_path,
-                                                     bird_name=regex_match.group("bird_name"),
+                                                     bird_name=bird_name,
                                                      user_name=user_name,
-                                                     subpath=regex_match.group("subpath"))
+                                                     subpath=subpath)
             else:  # public paths
                 if not process_public_paths:
                     return False
@@ -343,7 +721,7 @@ class FileSystem(Handler, FSMonitor):
 
         :param path: Absolute path of a new file/directory
         """
-        if Path(self.wps_outputs_dir) in Path(path).parents:
+        if path.startswith(self._wps_outputs_prefix):
             LOGGER.info("Removing link associated to the deleted path `%s`", path)
             self._delete_wps_outputs_hardlink(path)
 
@@ -353,7 +731,7 @@ class FileSystem(Handler, FSMonitor):
         """
         root_res_info = res_tree[0]
         if root_res_info["resource_name"] == self.secure_data_proxy_name:
-            svc_info = HandlerFactory().get_handler("Magpie").get_service_info(self.secure_data_proxy_name)
+            svc_info = self.magpie_handler.get_service_info(self.secure_data_proxy_name)
             if svc_info["service_type"] == ServiceAPI.service_type:
                 return True
 
@@ -361,7 +739,7 @@ class FileSystem(Handler, FSMonitor):
         return False
 
     def _update_permissions_on_filesystem(self, permission: Permission) -> None:
-        magpie_handler = HandlerFactory().get_handler("Magpie")
+        magpie_handler = self.magpie_handler
         res_tree = magpie_handler.get_parents_resource_tree(permission.resource_id)
 
         # Only process WPS outputs permissions on the secure-data-proxy service
@@ -384,48 +762,63 @@ class FileSystem(Handler, FSMonitor):
                 full_route = os.path.join(full_route, child_route)
 
             # Find all users related to the permission
+            # Users are indexed by the string value of their id, to match the ids found in the paths directly.
             if permission.user:
-                users = {magpie_handler.get_user_id_from_user_name(permission.user): permission.user}
+                users = {str(magpie_handler.get_user_id_from_user_name(permission.user)): permission.user}
             else:
                 # Find all users from the group
                 users = {}
                 for username in magpie_handler.get_user_names_by_group_name(permission.group):
-                    users[magpie_handler.get_user_id_from_user_name(username)] = username
+                    users[str(magpie_handler.get_user_id_from_user_name(username))] = username
+
+            if not users:
+                LOGGER.debug("No user found for the permission on the resource `%s`. No WPS outputs file to update.",
+                             permission.resource_full_name)
+                return
 
             # Find all contained user paths
-            user_routes = {}
+            user_routes: Dict[str, Tuple[str, str, str]] = {}
             if os.path.isfile(full_route):
                 # use current route directly if it's a user data file
-                regex_match = self.wps_outputs_user_data_regex.search(full_route)
-                if regex_match and int(regex_match.group("user_id")) in users:
-                    user_routes[full_route] = regex_match
+                user_path_info = self._parse_user_path(full_route)
+                if user_path_info and user_path_info[1] in users:
+                    user_routes[full_route] = user_path_info
             else:  # dir case, browse to find all children user file paths
-                for root, _, filenames in os.walk(full_route):
-                    for file in filenames:
-                        full_path = os.path.join(root, file)
-                        regex_match = self.wps_outputs_user_data_regex.search(full_path)
-                        if regex_match and int(regex_match.group("user_id")) in users:
-                            user_routes[full_path] = regex_match
+                for full_path in self._iter_user_wps_outputs_files(full_route, users):
+                    user_path_info = self._parse_user_path(full_path)
+                    if user_path_info and user_path_info[1] in users:
+                        user_routes[full_path] = user_path_info
 
             # Update permissions for all found user paths
-            for user_path, path_regex_match in user_routes.items():
-                user_name = users[int(path_regex_match.group("user_id"))]
-                access_allowed = self.update_secure_data_proxy_path_perms(user_path, user_name)
-                try:
-                    hardlink_path = self.get_user_hardlink(src_path=user_path,
-                                                           bird_name=path_regex_match.group("bird_name"),
-                                                           user_name=user_name,
-                                                           subpath=path_regex_match.group("subpath"))
-                except FileNotFoundError:
+            # The user workspace is checked once per user, instead of being checked on the filesystem for each of the
+            # user's files.
+            user_workspace_exists: Dict[str, bool] = {}
+            # The secure-data-proxy resources are retrieved once, and the resolved permissions are shared by all the
+            # files found under a same route, instead of requesting Magpie for each file.
+            sdp_resource = self._get_secure_data_proxy_resource() if user_routes else None
+            perms_cache: Dict[Tuple[str, int], Tuple[bool, bool]] = {}
+            children_cache: Dict[int, Dict[str, JSON]] = {}
+            created_dirs: Set[str] = set()
+            for user_path, (bird_name, user_id, subpath) in user_routes.items():
+                user_name = users[user_id]
+                access_allowed = self.update_secure_data_proxy_path_perms(user_path, user_name,
+                                                                          sdp_resource=sdp_resource,
+                                                                          perms_cache=perms_cache,
+                                                                          children_cache=children_cache)
+                if user_name not in user_workspace_exists:
+                    user_workspace_exists[user_name] = os.path.exists(self.get_user_workspace_dir(user_name))
+                if not user_workspace_exists[user_name]:
                     LOGGER.warning("Failed to find a hardlink path corresponding to the source path [%s]. The user `%s`"
                                    " should already have an existing workspace.",
                                    user_path, user_name)
                     continue
+                hardlink_path = self._get_user_hardlink_no_check(bird_name=bird_name,
+                                                                 user_name=user_name,
+                                                                 subpath=subpath)
 
                 # Resync hardlink path
-                if os.path.exists(hardlink_path):
-                    os.remove(hardlink_path)
-                self.create_hardlink_path(user_path, hardlink_path, access_allowed)
+                self.create_hardlink_path(user_path, hardlink_path, access_allowed, overwrite=True,
+                                          created_dirs=created_dirs)
 
     def permission_created(self, permission: Permission) -> None:
         self._update_permissions_on_filesystem(permission)
@@ -433,6 +826,36 @@ class FileSystem(Handler, FSMonitor):
     def permission_deleted(self, permission: Permission) -> None:
         self._update_permissions_on_filesystem(permission)
 
+    @staticmethod
+    def _remove_unexpected_paths(root: str, expected_paths: Set[str]) -> bool:
+        """
+        Removes every file found under the root directory that is not one of the expected paths, and every directory
+        left empty, except the root directory itself.
+
+        Returns a bool to indicate if the root directory is left empty.
+        """
+        try:
+            with os.scandir(root) as scanned_entries:
+                entries = list(scanned_entries)
+        except FileNotFoundError:
+            return True
+        is_empty = True
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if FileSystem._remove_unexpected_paths(entry.path, expected_paths):
+                        os.rmdir(entry.path)
+                    else:
+                        is_empty = False
+                elif entry.path in expected_paths:
+                    is_empty = False
+                else:
+                    os.remove(entry.path)
+            except Exception as exc:
+                LOGGER.error("Failed to delete path [%s].", entry.path, exc_info=exc)
+                is_empty = False
+        return is_empty
+
     def resync(self) -> None:
         """
         Resync operation, regenerating required links (user_workspace, wps_outputs, ...)
@@ -442,32 +865,34 @@ class FileSystem(Handler, FSMonitor):
             LOGGER.warning("Skipping resync operation for WPS outputs folder since the source folder `%s` could not be "
                            "found", self.wps_outputs_dir)
         else:
-            # Delete the content of the linked public folder, but keep the folder to avoid breaking the volume
-            # if the folder is mounted on a Docker container
-            public_workspace_wps_outputs_dir = self.get_public_workspace_wps_outputs_dir()
-            if not os.path.exists(public_workspace_wps_outputs_dir):
-                LOGGER.debug("Linked public wps outputs data folder [%s] does not exist. "
-                             "No public file to delete for the resync operation.", public_workspace_wps_outputs_dir)
-            else:
-                for filename in os.listdir(public_workspace_wps_outputs_dir):
-                    file_path = os.path.join(public_workspace_wps_outputs_dir, filename)
-                    try:
-                        if os.path.isfile(file_path):
-                            os.remove(file_path)
-                        elif os.path.isdir(file_path):
-                            shutil.rmtree(file_path)
-                    except Exception as exc:
-                        LOGGER.error("Failed to delete path [%s].", file_path, exc_info=exc)
-
-            # Delete wps outputs hardlinks for each user
-            user_list = HandlerFactory().get_handler("Magpie").get_user_list()
-            for user_name in user_list:
-                shutil.rmtree(self.get_user_workspace_wps_outputs_dir(user_name), ignore_errors=True)
+            # The names of all users are retrieved with a single request, and reused to create the hardlinks.
+            user_name_cache = self._get_user_names_by_id()
 
             # Create all hardlinks from files of the current source folder
-            for root, _, filenames in os.walk(self.wps_outputs_dir):
-                for file in filenames:
-                    full_path = os.path.join(root, file)
-                    self._create_wps_outputs_hardlink(src_path=full_path, overwrite=True)
+            # Existing hardlinks that already refer to their source file are kept as is, instead of removing and
+            # recreating all the hardlinks.
+            linked_paths: Set[str] = set()
+            try:
+                self._create_wps_outputs_hardlinks(self._iter_wps_outputs_files(self.wps_outputs_dir),
+                                                   linked_paths=linked_paths,
+                                                   overwrite=True,
+                                                   user_name_cache=user_name_cache)
+            finally:
+                # Delete any other path found in the linked public folder and in the wps outputs folder of each user,
+                # including the hardlinks of the files that could not be validated by the previous operation.
+                # The linked folders themselves are kept, to avoid breaking the volume if a folder is mounted on a
+                # Docker container. The folders are independent, and are processed concurrently.
+                linked_dirs = [self.get_public_workspace_wps_outputs_dir()]
+                linked_dirs.extend(self.get_user_workspace_wps_outputs_dir(user_name)
+                                   for user_name in user_name_cache.values())
+                with ThreadPoolExecutor(max_workers=HARDLINK_MAX_WORKERS) as executor:
+                    list(executor.map(functools.partial(self._remove_unexpected_paths, expected_paths=linked_paths),
+                                      linked_dirs))
         # TODO: add resync of the user_workspace symlinks to the jupyterhub dirs,
         #   will be added during the resync task implementation
+
+
+class FileSystemError(Exception):
+    """
+    Generic error of the FileSystem handler operations, used to report the failures of a bulk operation.
+    """
@@ -2,14 +2,17 @@ import functools
 import os
 import re
 import stat
-from time import sleep
-from typing import Any, List, Optional, Protocol, Tuple, Union, cast, overload
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Protocol, Tuple, Union, cast, overload
 from typing_extensions import TypeAlias
 
 import requests
-from celery import Task, chain, shared_task
+from celery import Task, shared_task
+from celery.utils.time import get_exponential_backoff_interval
 from magpie.models import Layer, Workspace
 from magpie.permissions import Access, Scope
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from cowbird.handlers.handler import HANDLER_URL_PARAM, HANDLER_WORKSPACE_DIR_PARAM, Handler
 from cowbird.handlers.handler_factory import HandlerFactory
@@ -68,9 +71,47 @@ SHAPEFILE_MAIN_EXTENSION = ".shp"
 SHAPEFILE_REQUIRED_EXTENSIONS = [SHAPEFILE_MAIN_EXTENSION, ".prj", ".dbf", ".shx"]
 SHAPEFILE_OPTIONAL_EXTENSIONS = [".atx", ".sbx", ".qix", ".aih", ".ain", ".shp.xml", ".cpg"]
 SHAPEFILE_ALL_EXTENSIONS = SHAPEFILE_OPTIONAL_EXTENSIONS + SHAPEFILE_REQUIRED_EXTENSIONS
+SHAPEFILE_ALL_EXTENSIONS_SET = frozenset(SHAPEFILE_ALL_EXTENSIONS)
+# Maximum number of retries of the shapefile publishing task. The retries of an incomplete shapefile share their counter
+# with the automatic retries of the failed requests (see :class:`RequestTask`).
+SHAPEFILE_VALIDATION_MAX_RETRIES = 8
+
+GEOSERVER_READ_PERMISSIONS_SET = frozenset(GEOSERVER_READ_PERMISSIONS)
+GEOSERVER_WRITE_PERMISSIONS_SET = frozenset(GEOSERVER_WRITE_PERMISSIONS)
+GEOSERVER_ALL_PERMISSIONS_SET = GEOSERVER_READ_PERMISSIONS_SET | GEOSERVER_WRITE_PERMISSIONS_SET
 
 DEFAULT_DATASTORE_DIR_NAME = "shapefile_datastore"
 
+# Geoserver responses for workspace errors, which are returned as HTML content with misleading response codes
+WORKSPACE_EXISTS_REGEX = re.compile("Workspace &#39;.*&#39; already exists")
+WORKSPACE_NOT_FOUND_REGEX = re.compile("Workspace &#39;.*&#39; not found")
+
+# Native CRS of the published shapefiles, with the whitespace of the WKT definition collapsed once at import
+WGS84_NATIVE_CRS_WKT = " ".join("""
+    GEOGCS[
+        "WGS 84",
+        DATUM[
+            "World Geodetic System 1984",
+            SPHEROID["WGS 84", 6378137.0, 298.257223563, AUTHORITY["EPSG","7030"]],
+            AUTHORITY["EPSG","6326"]
+        ],
+        PRIMEM["Greenwich", 0.0, AUTHORITY["EPSG","8901"]],
+        UNIT["degree", 0.017453292519943295],
+        AXIS["Geodetic longitude", EAST],
+        AXIS["Geodetic latitude", NORTH],
+        AUTHORITY["EPSG","4326"]
+    ]
+""".split())
+
+# Client error codes that are caused by the server's state (request timeout, too many requests) and can be retried
+GEOSERVER_RETRIABLE_CLIENT_ERROR_CODES = frozenset([408, 429])
+
+# Maximum number of permissions created concurrently on Magpie for a same resource, since the requests are I/O bound
+MAGPIE_PERMISSIONS_MAX_WORKERS = 8
+
+# Number of attempts to reconnect to Geoserver for a same request, before failing and relying on the task retries
+GEOSERVER_CONNECT_RETRIES = 3
+
 LOGGER = get_logger(__name__)
 
 
@@ -117,12 +158,14 @@ def geoserver_response_handling(func: GeoserverFunc) -> GeoserverFunc:
         operation = func.__name__
         response_code = response.status_code
         fail_msg_intro = f"Operation [{operation}] failed"
-        regex_exists = "Workspace &#39;.*&#39; already exists"
-        regex_not_found = "Workspace &#39;.*&#39; not found"
 
         if response_code in (200, 201):
             LOGGER.info("Operation [%s] was successful.", operation)
-        elif response_code == 401 and re.search(regex_exists, response.text):
+            return response
+
+        # The response content is decoded once, and only for the error codes that need to inspect it.
+        response_text = response.text if response_code in (401, 404, 500) else ""
+        if response_code == 401 and WORKSPACE_EXISTS_REGEX.search(response_text):
             # This is done because Geoserver's reply/error code is misleading in this case and
             # returns HTML content.
             # LOGGER instead of GeoserverError because workspace existing should not block subsequent steps
@@ -131,14 +174,17 @@ def geoserver_response_handling(func: GeoserverFunc) -> GeoserverFunc:
             raise GeoserverError(f"{fail_msg_intro} because it lacks valid authentication credentials.")
         elif response_code == 403 and operation == "_remove_workspace_request":
             raise GeoserverError(f"{fail_msg_intro} : Make sure `recurse` is set to `true` to delete workspace")
-        elif response_code == 404 and re.search(regex_not_found, response.text):
+        elif response_code == 404 and WORKSPACE_NOT_FOUND_REGEX.search(response_text):
             raise GeoserverError(f"{fail_msg_intro}: Geoserver workspace was not found")
-        elif response_code == 404 and "No such data store" in response.text:
+        elif response_code == 404 and "No such data store" in response_text:
             raise GeoserverError(f"{fail_msg_intro} :Geoserver datastore was not found")
-        elif response_code == 404 and "No such feature type" in response.text:
+        elif response_code == 404 and "No such feature type" in response_text:
             raise GeoserverError(f"{fail_msg_intro} :Geoserver feature type was not found")
         elif response_code == 500:
-            raise GeoserverError(f"{fail_msg_intro} : {response.text}")
+            raise GeoserverError(f"{fail_msg_intro} : {response_text}")
+        elif 400 <= response_code < 500 and response_code not in GEOSERVER_RETRIABLE_CLIENT_ERROR_CODES:
+            # Retrying the same request would only fail again, so the error is not raised as a RequestException.
+            raise GeoserverError(f"{fail_msg_intro} with HTTP client error code [{response_code}]")
         else:
             raise requests.RequestException(f"{fail_msg_intro} with HTTP error code [{response_code}]")
 
@@ -173,7 +219,23 @@ class Geoserver(Handler, FSMonitor):
         self.admin_user = admin_user
         self.admin_password = admin_password
         self.auth = (self.admin_user, self.admin_password)
-        self.datastore_regex = rf"^{self.workspace_dir}/\w+/{DEFAULT_DATASTORE_DIR_NAME}/?$"
+        # Compiled once, since it is matched against the paths of the file system events
+        self.datastore_regex = re.compile(rf"^{re.escape(self.workspace_dir)}/\w+/{DEFAULT_DATASTORE_DIR_NAME}/?$")
+
+        # Session reused by all the requests to Geoserver, to keep the connections alive between requests.
+        # Only failed connections are retried, since the request was not sent to Geoserver in that case. Any other
+        # error is handled by the response handling and the RequestTask retries.
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(max_retries=Retry(total=None,
+                                                connect=GEOSERVER_CONNECT_RETRIES,
+                                                read=0,
+                                                status=0,
+                                                other=0,
+                                                backoff_factor=0.5))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     #
     # Implementation of parent classes' functions
@@ -182,8 +244,7 @@ class Geoserver(Handler, FSMonitor):
     # Handler class functions
     def user_created(self, user_name: str) -> None:
         self._create_datastore_dir(user_name)
-        res = chain(create_workspace.si(user_name), create_datastore.si(user_name))
-        res.delay()
+        create_workspace_and_datastore.delay(user_name)
         LOGGER.info("Start monitoring datastore of created user [%s]", user_name)
         Monitoring().register(self._shapefile_folder_dir(user_name), True, Geoserver)
 
@@ -193,7 +254,7 @@ class Geoserver(Handler, FSMonitor):
         Monitoring().unregister(self._shapefile_folder_dir(user_name), self)
 
         # Attempt to delete the corresponding resources in Magpie
-        magpie_handler = HandlerFactory().get_handler("Magpie")
+        magpie_handler = self.magpie_handler
         workspace_res_id = magpie_handler.get_geoserver_workspace_res_id(user_name)
         if not workspace_res_id:
             LOGGER.debug("No workspace resource named `%s` to delete in Magpie.", user_name)
@@ -204,9 +265,29 @@ class Geoserver(Handler, FSMonitor):
         """
         Generates the list of all files associated with a shapefile name.
         """
-        base_filename = self._shapefile_folder_dir(workspace_name) + "/" + shapefile_name
+        base_filename = f"{self._shapefile_folder_dir(workspace_name)}/{shapefile_name}"
         return [base_filename + ext for ext in SHAPEFILE_ALL_EXTENSIONS]
 
+    def _get_existing_shapefile_files(self, workspace_name: str, shapefile_name: str) -> Dict[str, str]:
+        """
+        Finds the existing files associated with a shapefile name, using a single scan of the datastore folder.
+
+        Only regular files are considered, so that a directory using a shapefile name is never treated as a part of it.
+
+        :returns: Paths of the existing files, by their shapefile extension.
+        """
+        existing_files = {}
+        try:
+            with os.scandir(self._shapefile_folder_dir(workspace_name)) as entries:
+                for entry in entries:
+                    if entry.name.startswith(shapefile_name) and entry.is_file():
+                        extension = entry.name[len(shapefile_name):]
+                        if extension in SHAPEFILE_ALL_EXTENSIONS_SET:
+                            existing_files[extension] = entry.path
+        except FileNotFoundError:
+            pass
+        return existing_files
+
     def _update_resource_paths_permissions(self,
                                            resource_type: str,
                                            permission: Permission,
@@ -217,20 +298,26 @@ class Geoserver(Handler, FSMonitor):
         """
         Updates a single Magpie resource's associated paths according to its permissions found on Magpie.
         """
+        datastore_dir = self._shapefile_folder_dir(workspace_name)
         if resource_type == Layer.resource_type_name:
             if not layer_name:
                 raise GeoserverError("Missing layer name to update permissions.")
-            path_list = self.get_shapefile_list(workspace_name, layer_name)
+            existing_files = self._get_existing_shapefile_files(workspace_name, layer_name)
+            for extension in SHAPEFILE_REQUIRED_EXTENSIONS:
+                if extension not in existing_files:
+                    LOGGER.warning("%s could not be found and its permissions could not be updated.",
+                                   f"{datastore_dir}/{layer_name}{extension}")
+            path_list = list(existing_files.values())
         else:
-            path_list = [self._shapefile_folder_dir(workspace_name)]
+            path_list = [datastore_dir] if os.path.exists(datastore_dir) else []
         # Get the actual effective user permissions
-        user_permissions = HandlerFactory().get_handler("Magpie").get_user_permissions_by_res_id(
+        user_permissions = self.magpie_handler.get_user_permissions_by_res_id(
             permission.user, resource_id, effective=True)
 
         allowed_user_perm_names = {p["name"] for p in user_permissions["permissions"]
                                    if p["access"] == Access.ALLOW.value}
-        is_readable = any(p in GEOSERVER_READ_PERMISSIONS for p in allowed_user_perm_names)
-        is_writable = any(p in GEOSERVER_WRITE_PERMISSIONS for p in allowed_user_perm_names)
+        is_readable = not allowed_user_perm_names.isdisjoint(GEOSERVER_READ_PERMISSIONS_SET)
+        is_writable = not allowed_user_perm_names.isdisjoint(GEOSERVER_WRITE_PERMISSIONS_SET)
         # Execute permissions are not required for shapefiles, so they will be disabled.
         # Execute permissions are always left enabled for directories.
         # If the workspace has a `Deny` read permission, only its read permission is disabled, blocking the access to
@@ -240,12 +327,10 @@ class Geoserver(Handler, FSMonitor):
         is_executable = resource_type == Workspace.resource_type_name
 
         for path in path_list:
-            if not os.path.exists(path):
-                if path.endswith(tuple(SHAPEFILE_REQUIRED_EXTENSIONS)):
-                    LOGGER.warning("%s could not be found and its permissions could not be updated.", path)
-                continue
-            apply_new_path_permissions(path, is_readable, is_writable, is_executable)
-            apply_default_path_ownership(path)
+            # Changing the permissions does not change the ownership, so the same status can be used for both
+            path_stat = os.stat(path)
+            apply_new_path_permissions(path, is_readable, is_writable, is_executable, path_stat=path_stat)
+            apply_default_path_ownership(path, path_stat=path_stat)
 
     def _update_resource_paths_permissions_recursive(self,
                                                      resource: JSON,
@@ -253,34 +338,37 @@ class Geoserver(Handler, FSMonitor):
                                                      workspace_name: str,
                                                      ) -> None:
         """
-        Recursive method to update all the path permissions of a resource and its children resources as found on Magpie.
-        """
-        resource_type: str = resource["resource_type"]
-        if resource_type in [Workspace.resource_type_name, Layer.resource_type_name]:
-            layer_name: str = resource["resource_name"] if resource_type == Layer.resource_type_name else None
-            res_id: int = resource["resource_id"]
-            self._update_resource_paths_permissions(resource_type=resource_type,
-                                                    permission=permission,
-                                                    resource_id=res_id,
-                                                    workspace_name=workspace_name,
-                                                    layer_name=layer_name)
-
-        if permission.scope == Scope.RECURSIVE.value:
-            for children_res in cast(JSON, resource["children"]).values():
-                self._update_resource_paths_permissions_recursive(resource=children_res,
-                                                                  permission=permission,
-                                                                  workspace_name=workspace_name)
+        Updates all the path permissions of a resource and, for a recursive permission, of all its children resources as
+        found on Magpie.
+
+        The resource tree is walked using a stack instead of recursive calls.
+        """
+        is_recursive = permission.scope == Scope.RECURSIVE.value
+        resources = [resource]
+        while resources:
+            resource = resources.pop()
+            resource_type: str = resource["resource_type"]
+            if resource_type in (Workspace.resource_type_name, Layer.resource_type_name):
+                layer_name: str = resource["resource_name"] if resource_type == Layer.resource_type_name else None
+                res_id: int = resource["resource_id"]
+                self._update_resource_paths_permissions(resource_type=resource_type,
+                                                        permission=permission,
+                                                        resource_id=res_id,
+                                                        workspace_name=workspace_name,
+                                                        layer_name=layer_name)
+            if is_recursive:
+                resources.extend(cast(JSON, resource["children"]).values())
 
     def _update_permissions_on_filesystem(self, permission: Permission) -> None:
         """
         Updates the permissions of dir/files on the file system, after receiving a permission webhook event from Magpie.
         """
-        if permission.name not in GEOSERVER_READ_PERMISSIONS + GEOSERVER_WRITE_PERMISSIONS:
+        if permission.name not in GEOSERVER_ALL_PERMISSIONS_SET:
             LOGGER.info("Nothing to do, since the permission `%s` is not specific to a Geoserver type service.",
                         permission.name)
             return
 
-        magpie_handler = HandlerFactory().get_handler("Magpie")
+        magpie_handler = self.magpie_handler
 
         if permission.user is None:
             raise NotImplementedError("A permission change on a group is not supported for now on Geoserver, since "
@@ -311,14 +399,21 @@ class Geoserver(Handler, FSMonitor):
         """
         return HandlerFactory().get_handler("Geoserver")
 
+    @staticmethod
+    def publish_shapefile_task(workspace_name: str, shapefile_name: str) -> None:
+        """
+        Applies the celery task required to validate and publish a new file to Geoserver.
+        """
+        validate_and_publish_shapefile.delay(workspace_name, shapefile_name)
+
     @staticmethod
     def publish_shapefile_task_chain(workspace_name: str, shapefile_name: str) -> None:
         """
-        Applies the chain of tasks required to publish a new file to Geoserver.
+        Deprecated alias of :meth:`publish_shapefile_task`, kept for one release.
         """
-        res = chain(validate_shapefile.si(workspace_name, shapefile_name),
-                    publish_shapefile.si(workspace_name, shapefile_name))
-        res.delay()
+        LOGGER.warning("`Geoserver.publish_shapefile_task_chain` is deprecated and will be removed in the next "
+                       "release. Use `Geoserver.publish_shapefile_task` instead.")
+        Geoserver.publish_shapefile_task(workspace_name, shapefile_name)
 
     def on_created(self, path: str) -> None:
         """
@@ -333,7 +428,7 @@ class Geoserver(Handler, FSMonitor):
             workspace_name, shapefile_name = self._get_shapefile_info(path)
 
             LOGGER.info("Starting Geoserver publishing process for [%s]", path)
-            Geoserver.publish_shapefile_task_chain(workspace_name, shapefile_name)
+            Geoserver.publish_shapefile_task(workspace_name, shapefile_name)
 
             self._update_magpie_layer_permissions(workspace_name, shapefile_name)
 
@@ -350,7 +445,7 @@ class Geoserver(Handler, FSMonitor):
 
         :param path: Absolute path of a new file/directory
         """
-        if os.path.isdir(path) and re.match(self.datastore_regex, path):
+        if self._is_datastore_dir(path) and os.path.isdir(path):
             # Note that the geoserver workspace and corresponding Magpie resources are only removed when the user is
             # deleted. The manual deletion of a datastore folder should be avoided.
             LOGGER.warning("An event was triggered for the deletion of the folder `%s`. The folder should "
@@ -361,12 +456,14 @@ class Geoserver(Handler, FSMonitor):
             Geoserver.remove_shapefile_task(workspace_name, shapefile_name)
 
             # Remove all the remaining shapefile related files
-            for file in self.get_shapefile_list(workspace_name, shapefile_name):
-                if os.path.exists(file):
+            for file in self._get_existing_shapefile_files(workspace_name, shapefile_name).values():
+                try:
                     os.remove(file)
+                except FileNotFoundError:
+                    pass
 
             # Remove the corresponding Magpie resource
-            magpie_handler = HandlerFactory().get_handler("Magpie")
+            magpie_handler = self.magpie_handler
             layer_res_id = magpie_handler.get_geoserver_layer_res_id(workspace_name, shapefile_name)
             if layer_res_id:
                 magpie_handler.delete_resource(layer_res_id)
@@ -379,7 +476,7 @@ class Geoserver(Handler, FSMonitor):
         """
         # Nothing needs to be done specifically for Geoserver as Catalog already logs file modifications.
         # Only need to update permissions on Magpie, in case the resource permissions were modified.
-        if os.path.isdir(path) and re.match(self.datastore_regex, path):
+        if self._is_datastore_dir(path) and os.path.isdir(path):
             workspace_name = path.split("/")[-2]
             self._update_magpie_workspace_permissions(workspace_name)
         elif path.endswith(SHAPEFILE_MAIN_EXTENSION):
@@ -390,8 +487,9 @@ class Geoserver(Handler, FSMonitor):
         # FIXME: this should be implemented in the eventual task addressing the resync mechanism.
         LOGGER.warning("Event [resync] for handler [%s] is not implemented but should be in the future", self.name)
 
-    @staticmethod
-    def _is_permission_update_required(effective_permissions: List[JSON],
+    def _is_permission_update_required(self,
+                                       effective_permissions: List[JSON],
+                                       actual_perms_on_resource: List[JSON],
                                        user_name: str,
                                        res_id: int,
                                        perm_name: str,
@@ -403,16 +501,11 @@ class Geoserver(Handler, FSMonitor):
         Checks if the required permission already exists on the resource, else returns true if an update is required.
 
         Also, deletes the permission if the associated input argument is activated.
-        """
-        magpie_handler = HandlerFactory().get_handler("Magpie")
-        actual_perms_on_resource: List[JSON] = []
-
-        if perm_scope == Scope.RECURSIVE.value:
-            # Special case for recursive permissions. We have to check the actual permission on the resource to verify
-            # the actual scope.
-            body: JSON = magpie_handler.get_user_permissions_by_res_id(user_name, res_id, effective=False)
-            actual_perms_on_resource = cast(List[JSON], body["permissions"])
 
+        The ``actual_perms_on_resource`` are the non-effective permissions found directly on the resource, which are
+        only required to validate the scope of recursive permissions.
+        """
+        magpie_handler = self.magpie_handler
         for perm in effective_permissions:
             if perm["name"] == perm_name:
                 if perm["access"] == perm_access and perm_scope == Scope.RECURSIVE.value:
@@ -434,8 +527,8 @@ class Geoserver(Handler, FSMonitor):
                 break
         return True
 
-    @staticmethod
-    def _update_magpie_permissions(user_name: str,
+    def _update_magpie_permissions(self,
+                                   user_name: str,
                                    res_id: int,
                                    perm_scope: str,
                                    is_readable: bool,
@@ -444,63 +537,81 @@ class Geoserver(Handler, FSMonitor):
         """
         Updates permissions on a Magpie resource (workspace/layer).
         """
-        magpie_handler = HandlerFactory().get_handler("Magpie")
+        magpie_handler = self.magpie_handler
 
-        allowed_perms = set(GEOSERVER_READ_PERMISSIONS if is_readable else [])
-        allowed_perms = allowed_perms.union(GEOSERVER_WRITE_PERMISSIONS if is_writable else [])
-        denied_perms = set(GEOSERVER_READ_PERMISSIONS + GEOSERVER_WRITE_PERMISSIONS).difference(allowed_perms)
+        allowed_perms = ((GEOSERVER_READ_PERMISSIONS_SET if is_readable else frozenset()) |
+                         (GEOSERVER_WRITE_PERMISSIONS_SET if is_writable else frozenset()))
+        denied_perms = GEOSERVER_ALL_PERMISSIONS_SET - allowed_perms
         perm_names_and_access = ([(p, Access.ALLOW.value) for p in allowed_perms] +
                                  [(p, Access.DENY.value) for p in denied_perms])
 
         # Get resolved permissions on magpie
         user_perms_body: JSON = magpie_handler.get_user_permissions_by_res_id(user_name, res_id, effective=True)
         user_permissions = cast(List[JSON], user_perms_body["permissions"])
+        actual_perms_on_resource: List[JSON] = []
+        if perm_scope == Scope.RECURSIVE.value:
+            # Special case for recursive permissions. We have to check the actual permission on the resource to verify
+            # the actual scope. Each permission name is only checked once below, so a single request is sufficient.
+            actual_perms_body: JSON = magpie_handler.get_user_permissions_by_res_id(user_name, res_id, effective=False)
+            actual_perms_on_resource = cast(List[JSON], actual_perms_body["permissions"])
 
         perms_to_update = set()
         for perm_name, perm_access in perm_names_and_access:
             # Find all permissions that actually need an update. If the permission already exists but still needs an
             # update, delete the permission, and check in the next steps if the permission still needs an update
             # according to the new effective permission solving.
-            if Geoserver._is_permission_update_required(effective_permissions=user_permissions,
-                                                        user_name=user_name,
-                                                        res_id=res_id,
-                                                        perm_name=perm_name,
-                                                        perm_access=perm_access,
-                                                        perm_scope=perm_scope,
-                                                        delete_if_required=True):
+            if self._is_permission_update_required(effective_permissions=user_permissions,
+                                                   actual_perms_on_resource=actual_perms_on_resource,
+                                                   user_name=user_name,
+                                                   res_id=res_id,
+                                                   perm_name=perm_name,
+                                                   perm_access=perm_access,
+                                                   perm_scope=perm_scope,
+                                                   delete_if_required=True):
                 perms_to_update.add((perm_name, perm_access))
 
-        # Get new resolved permissions on magpie, after previous perms update were applied
-        body: JSON = magpie_handler.get_user_permissions_by_res_id(user_name, res_id, effective=True)
-        user_permissions = cast(List[JSON], body["permissions"])
+        # Get new resolved permissions on magpie, after previous perms update were applied. A permission was only
+        # deleted if it was already resolved on the resource, otherwise the resolved permissions are still valid.
+        if any(p["name"] == perm_name for p in user_permissions for perm_name, _ in perms_to_update):
+            body: JSON = magpie_handler.get_user_permissions_by_res_id(user_name, res_id, effective=True)
+            user_permissions = cast(List[JSON], body["permissions"])
 
         # Only apply new allow/deny permissions if required. If parent resources already have the required recursive
         # allow/deny, a new permission is not necessary and will not be created in order to simplify
         # effective permission solving.
-        for perm_name, perm_access in perms_to_update:
-            # No need to check the scope, since only `match` scopes are returned when getting `effective` permissions,
-            # even if the permission comes from a `recursive` permission of a parent resource.
-            if not any(p["name"] == perm_name and p["access"] == perm_access for p in user_permissions):
-                magpie_handler.create_permission_by_user_and_res_id(
-                    user_name=user_name,
-                    res_id=res_id,
-                    perm_name=perm_name,
-                    perm_access=perm_access,
-                    perm_scope=perm_scope)
+        # No need to check the scope, since only `match` scopes are returned when getting `effective` permissions,
+        # even if the permission comes from a `recursive` permission of a parent resource.
+        perms_to_create = [(perm_name, perm_access) for perm_name, perm_access in perms_to_update
+                           if not any(p["name"] == perm_name and p["access"] == perm_access for p in user_permissions)]
+        if not perms_to_create:
+            return
+        # Each permission has a different name, so they are created concurrently to overlap the Magpie requests.
+        # The handler already signed in to Magpie with the previous requests, and any new login is serialized.
+        with ThreadPoolExecutor(max_workers=min(len(perms_to_create), MAGPIE_PERMISSIONS_MAX_WORKERS)) as executor:
+            futures = [executor.submit(magpie_handler.create_permission_by_user_and_res_id,
+                                       user_name=user_name,
+                                       res_id=res_id,
+                                       perm_name=perm_name,
+                                       perm_access=perm_access,
+                                       perm_scope=perm_scope)
+                       for perm_name, perm_access in perms_to_create]
+            for future in futures:
+                future.result()
 
     def _update_magpie_workspace_permissions(self, workspace_name: str) -> None:
         """
         Updates the permissions of a `workspace` resource on Magpie to the current permissions found on the
         corresponding datastore folder.
         """
-        magpie_handler = HandlerFactory().get_handler("Magpie")
+        magpie_handler = self.magpie_handler
         workspace_res_id = magpie_handler.get_geoserver_workspace_res_id(workspace_name, create_if_missing=True)
 
         datastore_dir_path = self._shapefile_folder_dir(workspace_name)
+        datastore_dir_stat = os.stat(datastore_dir_path)
         # Make sure the directory has the right ownership
-        apply_default_path_ownership(datastore_dir_path)
+        apply_default_path_ownership(datastore_dir_path, path_stat=datastore_dir_stat)
 
-        workspace_status = os.stat(datastore_dir_path)[stat.ST_MODE]
+        workspace_status = datastore_dir_stat[stat.ST_MODE]
         is_readable = bool(workspace_status & stat.S_IROTH and workspace_status & stat.S_IXOTH)
         is_writable = bool(workspace_status & stat.S_IWOTH)
 
@@ -515,7 +626,7 @@ class Geoserver(Handler, FSMonitor):
         Updates the permissions of a `layer` resource on Magpie to the current permissions found on the corresponding
         shapefile.
         """
-        magpie_handler = HandlerFactory().get_handler("Magpie")
+        magpie_handler = self.magpie_handler
         layer_res_id = magpie_handler.get_geoserver_layer_res_id(workspace_name, layer_name, create_if_missing=True)
 
         # Get permissions of the shapefile's main file
@@ -592,13 +703,13 @@ class Geoserver(Handler, FSMonitor):
         :param workspace_name: Name of the workspace from which the shapefile will be published
         :param shapefile_name: The shapefile's name, without file extension
         """
-        # Small wait time to prevent unnecessary failure since shapefile is a multi file format
-        sleep(1)
-        files_to_find = [f"{self._shapefile_folder_dir(workspace_name)}/{shapefile_name}{ext}"
-                         for ext in SHAPEFILE_REQUIRED_EXTENSIONS]
-        for file in files_to_find:
-            if not os.path.isfile(file):
-                LOGGER.warning("Shapefile is incomplete: Missing [%s]", file)
+        # Since shapefile is a multi file format, the other files might not be written yet. The calling task is
+        # retried later instead of waiting here.
+        datastore_dir = self._shapefile_folder_dir(workspace_name)
+        existing_files = self._get_existing_shapefile_files(workspace_name, shapefile_name)
+        for ext in SHAPEFILE_REQUIRED_EXTENSIONS:
+            if ext not in existing_files:
+                LOGGER.warning("Shapefile is incomplete: Missing [%s]", f"{datastore_dir}/{shapefile_name}{ext}")
                 raise FileNotFoundError
         LOGGER.info("Shapefile [%s] is valid", shapefile_name)
 
@@ -610,12 +721,14 @@ class Geoserver(Handler, FSMonitor):
         is_shapefile_writable = False
 
         # Only consider the shapefile's main file for the permissions
-        shapefile_path = self._shapefile_folder_dir(workspace_name) + "/" + shapefile_name + SHAPEFILE_MAIN_EXTENSION
+        shapefile_path = f"{self._shapefile_folder_dir(workspace_name)}/{shapefile_name}{SHAPEFILE_MAIN_EXTENSION}"
 
-        if os.path.exists(shapefile_path):
+        try:
             file_status = os.stat(shapefile_path)[stat.ST_MODE]
             is_shapefile_readable = bool(file_status & stat.S_IROTH)
             is_shapefile_writable = bool(file_status & stat.S_IWOTH)
+        except FileNotFoundError:
+            pass
         return is_shapefile_readable, is_shapefile_writable
 
     def _normalize_shapefile_permissions(self,
@@ -627,13 +740,15 @@ class Geoserver(Handler, FSMonitor):
         Makes sure all files associated with a shapefile is owned by the default user/group and have the same
         permissions.
         """
-        for shapefile in self.get_shapefile_list(workspace_name, shapefile_name):
-            if os.path.exists(shapefile):
-                apply_default_path_ownership(shapefile)
-                apply_new_path_permissions(shapefile,
-                                           is_readable=is_readable,
-                                           is_writable=is_writable,
-                                           is_executable=False)
+        for shapefile in self._get_existing_shapefile_files(workspace_name, shapefile_name).values():
+            # Changing the ownership does not change the permissions, so the same status can be used for both
+            path_stat = os.stat(shapefile)
+            apply_default_path_ownership(shapefile, path_stat=path_stat)
+            apply_new_path_permissions(shapefile,
+                                       is_readable=is_readable,
+                                       is_writable=is_writable,
+                                       is_executable=False,
+                                       path_stat=path_stat)
 
     def remove_shapefile(self, workspace_name: str, filename: str) -> None:
         """
@@ -669,9 +784,9 @@ class Geoserver(Handler, FSMonitor):
         :param filename: Relative filename of a new file
         :returns: Workspace name (str) where file is located and shapefile name (str)
         """
-        split_path = filename.split("/")
+        split_path = filename.rsplit("/", 3)
         workspace = split_path[-3]
-        shapefile_name, _ = split_path[-1].split(".")
+        shapefile_name = split_path[-1].rpartition(".")[0]
 
         return workspace, shapefile_name
 
@@ -685,6 +800,14 @@ class Geoserver(Handler, FSMonitor):
         """
         return f"shapefile_datastore_{workspace_name}"
 
+    def _is_datastore_dir(self, path: str) -> bool:
+        """
+        Checks if a path corresponds to the datastore folder of a workspace, without any access to the file system.
+        """
+        # Cheap suffix check first, since most events are for the files found inside the datastore folders.
+        return (path.rstrip("/").endswith(f"/{DEFAULT_DATASTORE_DIR_NAME}") and
+                self.datastore_regex.match(path) is not None)
+
     def _shapefile_folder_dir(self, workspace_name: str) -> str:
         """
         Returns the path to the user's shapefile datastore inside the file system.
@@ -710,8 +833,7 @@ class Geoserver(Handler, FSMonitor):
         """
         request_url = f"{self.api_url}/workspaces/"
         payload = {"workspace": {"name": workspace_name, "isolated": "True"}}
-        response = requests.post(url=request_url, json=payload, auth=self.auth,
-                                 headers=self.headers, timeout=self.timeout)
+        response = self.session.post(url=request_url, json=payload, timeout=self.timeout)
         return response
 
     @geoserver_response_handling
@@ -726,8 +848,7 @@ class Geoserver(Handler, FSMonitor):
         :returns: Response object
         """
         request_url = f"{self.api_url}/workspaces/{workspace_name}?recurse=true"
-        response = requests.delete(url=request_url, auth=self.auth,
-                                   headers=self.headers, timeout=self.timeout)
+        response = self.session.delete(url=request_url, timeout=self.timeout)
         return response
 
     def _create_datastore_dir(self, workspace_name: str) -> None:
@@ -765,8 +886,7 @@ class Geoserver(Handler, FSMonitor):
                 },
             }
         }
-        response = requests.post(url=request_url, json=payload, auth=self.auth,
-                                 headers=self.headers, timeout=self.timeout)
+        response = self.session.post(url=request_url, json=payload, timeout=self.timeout)
         return response
 
     @geoserver_response_handling
@@ -818,8 +938,7 @@ class Geoserver(Handler, FSMonitor):
                 },
             }
         }
-        response = requests.put(url=request_url, json=payload, auth=self.auth,
-                                headers=self.headers, timeout=self.timeout)
+        response = self.session.put(url=request_url, json=payload, timeout=self.timeout)
         return response
 
     @geoserver_response_handling
@@ -844,29 +963,14 @@ class Geoserver(Handler, FSMonitor):
         payload = {
             "featureType": {
                 "name": filename,
-                "nativeCRS": """
-                                GEOGCS[
-                                    "WGS 84", 
-                                    DATUM[
-                                        "World Geodetic System 1984",
-                                        SPHEROID["WGS 84", 6378137.0, 298.257223563, AUTHORITY["EPSG","7030"]],
-                                        AUTHORITY["EPSG","6326"]
-                                    ],
-                                    PRIMEM["Greenwich", 0.0, AUTHORITY["EPSG","8901"]],
-                                    UNIT["degree", 0.017453292519943295],
-                                    AXIS["Geodetic longitude", EAST],
-                                    AXIS["Geodetic latitude", NORTH],
-                                    AUTHORITY["EPSG","4326"]
-                                ]
-                            """,
+                "nativeCRS": WGS84_NATIVE_CRS_WKT,
                 "srs": "EPSG:4326",
                 "projectionPolicy": "REPROJECT_TO_DECLARED",
                 "maxFeatures": 5000,
                 "numDecimals": 6,
             }
         }
-        response = requests.post(url=request_url, json=payload, auth=self.auth,
-                                 headers=self.headers, timeout=self.timeout)
+        response = self.session.post(url=request_url, json=payload, timeout=self.timeout)
         return response
 
     @geoserver_response_handling
@@ -888,27 +992,58 @@ class Geoserver(Handler, FSMonitor):
             f"{self.api_url}/workspaces/{workspace_name}/datastores/{datastore_name}"
             f"/featuretypes/{filename}?recurse=true"
         )
-        response = requests.delete(url=request_url, auth=self.auth,
-                                   headers=self.headers, timeout=self.timeout)
+        response = self.session.delete(url=request_url, timeout=self.timeout)
         return response
 
 
 @shared_task(bind=True, base=RequestTask, typing=True)
-def create_workspace(_task: Task[[str], None], user_name: str) -> None:
+def create_workspace_and_datastore(_task: Task[[str], None], user_name: str) -> None:
     # Avoid any actual logic in celery task handler, only task related stuff should be done here
-    return Geoserver.get_instance().create_workspace(user_name)
+    # Both steps are done by the same task to avoid the overhead of a chain. A retry also recreates the workspace, which
+    # is only logged by Geoserver if it already exists.
+    geoserver = Geoserver.get_instance()
+    geoserver.create_workspace(user_name)
+    geoserver.create_datastore(user_name)
 
 
 @shared_task(bind=True, base=RequestTask, typing=True)
-def create_datastore(_task: Task[[str], None], datastore_name: str) -> None:
+def remove_workspace(_task: Task[[str], None], workspace_name: str) -> None:
     # Avoid any actual logic in celery task handler, only task related stuff should be done here
-    return Geoserver.get_instance().create_datastore(datastore_name)
+    return Geoserver.get_instance().remove_workspace(workspace_name)
 
 
 @shared_task(bind=True, base=RequestTask, typing=True)
-def remove_workspace(_task: Task[[str], None], workspace_name: str) -> None:
+def validate_and_publish_shapefile(task: Task[[str, str], None], workspace_name: str, shapefile_name: str) -> None:
     # Avoid any actual logic in celery task handler, only task related stuff should be done here
-    return Geoserver.get_instance().remove_workspace(workspace_name)
+    geoserver = Geoserver.get_instance()
+    try:
+        geoserver.validate_shapefile(workspace_name, shapefile_name)
+    except FileNotFoundError as exc:
+        # Shapefile is a multi file format, the other files might not be written yet.
+        # The retry counter is shared with the automatic retries of RequestTask, so the same backoff strategy is used.
+        countdown = get_exponential_backoff_interval(factor=1,
+                                                     retries=task.request.retries,
+                                                     maximum=task.retry_backoff_max,
+                                                     full_jitter=task.retry_jitter)
+        raise task.retry(exc=exc, countdown=countdown, max_retries=SHAPEFILE_VALIDATION_MAX_RETRIES)
+    return geoserver.publish_shapefile(workspace_name, shapefile_name)
+
+
+@shared_task(bind=True, base=RequestTask, typing=True)
+def remove_shapefile(_task: Task[[Any, Any], None], workspace_name: str, shapefile_name: str) -> None:
+    return Geoserver.get_instance().remove_shapefile(workspace_name, shapefile_name)
+
+
+# Deprecated tasks, replaced by ``create_workspace_and_datastore`` and ``validate_and_publish_shapefile``.
+# They are only kept for one release so that messages already queued by a previous version can still be consumed.
+@shared_task(bind=True, base=RequestTask, typing=True)
+def create_workspace(_task: Task[[str], None], user_name: str) -> None:
+    return Geoserver.get_instance().create_workspace(user_name)
+
+
+@shared_task(bind=True, base=RequestTask, typing=True)
+def create_datastore(_task: Task[[str], None], datastore_name: str) -> None:
+    return Geoserver.get_instance().create_datastore(datastore_name)
 
 
 @shared_task(bind=True, autoretry_for=(FileNotFoundError,), retry_backoff=True, max_retries=8, typing=True)
@@ -921,11 +1056,6 @@ def publish_shapefile(_task: Task[[Any, Any], None], workspace_name: str, shapef
     return Geoserver.get_instance().publish_shapefile(workspace_name, shapefile_name)
 
 
-@shared_task(bind=True, base=RequestTask, typing=True)
-def remove_shapefile(_task: Task[[Any, Any], None], workspace_name: str, shapefile_name: str) -> None:
-    return Geoserver.get_instance().remove_shapefile(workspace_name, shapefile_name)
-
-
 class GeoserverError(Exception):
     """
     Generic Geoserver error used to break request chains, as RequestTask only retries for a specific exception
@@ -1,3 +1,4 @@
+import threading
 import time
 from typing import Any, Dict, List, Optional, Union
 
@@ -72,6 +73,9 @@ class Magpie(Handler):
         self.service_types = None
         self.cookies = None
         self.last_cookies_update_time = None
+        # The handler is shared by the threads of the bulk operations of other handlers, which must not sign in at the
+        # same time nor read the cookies while they are being updated.
+        self._login_lock = threading.Lock()
 
         self.permissions_synch = PermissionSynchronizer(self)
 
@@ -90,8 +94,7 @@ class Magpie(Handler):
 
         if resp.status_code in [401, 403]:
             # try refreshing cookies in case of Unauthorized or Forbidden error
-            self.cookies = None
-            cookies = self.login()
+            cookies = self.login(expired_cookies=cookies)
             resp = requests.request(method=method, url=url, params=params, json=json,
                                     cookies=cookies, headers=self.headers, timeout=self.timeout)
         return resp
@@ -231,16 +234,23 @@ class Magpie(Handler):
             raise MagpieHttpError(f"Could not find the user `{user_name}`. HttpError {resp.status_code} : {resp.text}")
         return resp.json()["user"]["user_id"]
 
-    def get_user_name_from_user_id(self, user_id: int) -> str:
+    def get_user_names_by_id(self) -> Dict[int, str]:
         """
-        Finds the name of a user from his user id.
+        Returns the names of all Magpie users, indexed by their user id.
         """
         resp = self._send_request(method="GET", url=f"{self.url}/users", params={"detail": True})
         if resp.status_code != 200:
             raise MagpieHttpError(f"Could not find the list of users. HttpError {resp.status_code} : {resp.text}")
-        for user_info in resp.json()["users"]:
-            if "user_id" in user_info and user_info["user_id"] == user_id:
-                return user_info["user_name"]
+        return {user_info["user_id"]: user_info["user_name"]
+                for user_info in resp.json()["users"] if "user_id" in user_info}
+
+    def get_user_name_from_user_id(self, user_id: int) -> str:
+        """
+        Finds the name of a user from his user id.
+        """
+        user_names = self.get_user_names_by_id()
+        if user_id in user_names:
+            return user_names[user_id]
         raise MagpieHttpError(f"Could not find any user with the id `{user_id}`.")
 
     def get_user_permissions(self, user: str) -> Dict[str, JSON]:
@@ -459,21 +469,25 @@ class Magpie(Handler):
         else:
             raise MagpieHttpError(f"HttpError {resp.status_code} - Failed to delete resource : {resp.text}")
 
-    def login(self) -> RequestsCookieJar:
+    def login(self, expired_cookies: Optional[RequestsCookieJar] = None) -> RequestsCookieJar:
         """
         Login to Magpie app using admin credentials.
-        """
-        if not self.cookies or not self.last_cookies_update_time \
-                or time.time() - self.last_cookies_update_time > COOKIES_TIMEOUT:
-            data = {"user_name": self.admin_user, "password": self.admin_password}
-            try:
-                resp = requests.post(f"{self.url}/signin", json=data, timeout=self.timeout)
-            except Exception as exc:
-                raise RuntimeError(f"Failed to sign in to Magpie (url: `{self.url}`) with user `{self.admin_user}`. "
-                                   f"Exception : {exc}. ")
-            self.cookies = resp.cookies
-            self.last_cookies_update_time = time.time()
-        return self.cookies
+
+        The login is thread-safe. If ``expired_cookies`` are provided, a new login is only done if they are still the
+        current cookies, so that threads rejected with the same cookies sign in only once.
+        """
+        with self._login_lock:
+            if not self.cookies or self.cookies is expired_cookies or not self.last_cookies_update_time \
+                    or time.time() - self.last_cookies_update_time > COOKIES_TIMEOUT:
+                data = {"user_name": self.admin_user, "password": self.admin_password}
+                try:
+                    resp = requests.post(f"{self.url}/signin", json=data, timeout=self.timeout)
+                except Exception as exc:
+                    raise RuntimeError(f"Failed to sign in to Magpie (url: `{self.url}`) with user "
+                                       f"`{self.admin_user}`. Exception : {exc}. ")
+                self.cookies = resp.cookies
+                self.last_cookies_update_time = time.time()
+            return self.cookies
 
 
 class MagpieHttpError(Exception):
@@ -597,12 +597,21 @@ def get_timeout(container: Optional[AnySettingsContainer] = None) -> int:
                             raise_missing=False, raise_not_set=False))
 
 
-def apply_new_path_permissions(path: str, is_readable: bool, is_writable: bool, is_executable: bool) -> None:
+def apply_new_path_permissions(path: str,
+                               is_readable: bool,
+                               is_writable: bool,
+                               is_executable: bool,
+                               path_stat: Optional[os.stat_result] = None,
+                               ) -> None:
     """
     Applies new permissions to a path, if required.
+
+    :param path_stat: Status of the path if already known by the caller, to avoid retrieving it again.
     """
+    if path_stat is None:
+        path_stat = os.stat(path)
     # Only use the 3 last octal digits
-    previous_perms = os.stat(path)[stat.ST_MODE] & 0o777
+    previous_perms = path_stat[stat.ST_MODE] & 0o777
 
     new_perms = update_filesystem_permissions(previous_perms,
                                               is_readable=is_readable,
@@ -634,11 +643,14 @@ def update_filesystem_permissions(permission: int, is_readable: bool, is_writabl
     return permission
 
 
-def apply_default_path_ownership(path: str) -> None:
+def apply_default_path_ownership(path: str, path_stat: Optional[os.stat_result] = None) -> None:
     """
     Applies default ownership to a path, if required.
+
+    :param path_stat: Status of the path if already known by the caller, to avoid retrieving it again.
     """
-    path_stat = os.stat(path)
+    if path_stat is None:
+        path_stat = os.stat(path)
     # Only apply chown if there is an actual change, to avoid looping events between Magpie and Cowbird
     if path_stat.st_uid != DEFAULT_ADMIN_UID or path_stat.st_gid != DEFAULT_ADMIN_GID:
         try:
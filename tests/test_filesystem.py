@@ -1,3 +1,4 @@
+# pylint: disable=protected-access
 import logging
 import os
 import re
@@ -5,7 +6,7 @@ import shutil
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, PropertyMock, patch
 
 import pytest
 import yaml
@@ -17,7 +18,7 @@ from webtest.app import TestApp
 
 from cowbird.api.schemas import ValidOperations
 from cowbird.handlers import HandlerFactory
-from cowbird.handlers.impl.filesystem import DEFAULT_NOTEBOOKS_DIR_NAME
+from cowbird.handlers.impl.filesystem import DEFAULT_NOTEBOOKS_DIR_NAME, USER_NAME_CACHE_TIMEOUT, FileSystemError
 from cowbird.typedefs import JSON
 from tests import test_magpie, utils
 
@@ -237,6 +238,82 @@ class TestFileSystemBasic(BaseTestFileSystem):
         filesystem_handler.on_created(os.path.join(self.wps_outputs_dir, bird_name))
         assert not os.path.exists(target_dir)
 
+    def test_public_wps_outputs_hardlinks_failure(self):
+        """
+        Tests that a failure on a file does not interrupt the creation of the hardlinks of the other files, and that
+        the failure is reported once all the files are processed.
+        """
+        self.get_test_app({
+            "handlers": {
+                "FileSystem": {
+                    "active": True,
+                    "workspace_dir": self.workspace_dir,
+                    "jupyterhub_user_data_dir": self.jupyterhub_user_data_dir,
+                    "wps_outputs_dir": self.wps_outputs_dir}}})
+
+        # Create test wps output files, in different directories to be processed by different threads
+        output_files = [os.path.join(self.wps_outputs_dir, f"weaver/{job_id}/test_output.txt") for job_id in range(3)]
+        for output_file in output_files:
+            os.makedirs(os.path.dirname(output_file))
+            Path(output_file).touch()
+        failing_file = output_files[1]
+
+        filesystem_handler = HandlerFactory().get_handler("FileSystem")
+        get_public_hardlink = filesystem_handler._get_public_hardlink
+
+        def get_public_hardlink_or_fail(src_path):
+            if src_path == failing_file:
+                raise PermissionError("Test error on a WPS outputs file")
+            return get_public_hardlink(src_path)
+
+        with patch.object(filesystem_handler, "_get_public_hardlink", side_effect=get_public_hardlink_or_fail):
+            with pytest.raises(FileSystemError):
+                filesystem_handler._create_wps_outputs_hardlinks(output_files)
+
+        for output_file in output_files:
+            hardlink_path = get_public_hardlink(output_file)
+            if output_file == failing_file:
+                assert not os.path.exists(hardlink_path)
+            else:
+                assert os.stat(hardlink_path).st_nlink == 2
+
+    def test_user_name_cache(self):
+        """
+        Tests that the user names resolved from Magpie are reused until they expire, and are forgotten when the user is
+        deleted.
+        """
+        self.get_test_app({
+            "handlers": {
+                "FileSystem": {
+                    "active": True,
+                    "workspace_dir": self.workspace_dir,
+                    "jupyterhub_user_data_dir": self.jupyterhub_user_data_dir,
+                    "wps_outputs_dir": self.wps_outputs_dir}}})
+        filesystem_handler = HandlerFactory().get_handler("FileSystem")
+        user_id = 1
+        magpie_handler = Mock()
+        magpie_handler.get_user_name_from_user_id.return_value = self.test_username
+
+        with patch("cowbird.handlers.impl.filesystem.FileSystem.magpie_handler", new_callable=PropertyMock,
+                   return_value=magpie_handler), \
+                patch("cowbird.handlers.impl.filesystem.time") as mock_time:
+            mock_time.time.return_value = 1000
+
+            # The user name is only requested once while it is cached
+            assert filesystem_handler._resolve_user_name(user_id) == self.test_username
+            assert filesystem_handler._resolve_user_name(user_id) == self.test_username
+            assert magpie_handler.get_user_name_from_user_id.call_count == 1
+
+            # The user name is requested again once it expired
+            mock_time.time.return_value = 1000 + USER_NAME_CACHE_TIMEOUT + 1
+            assert filesystem_handler._resolve_user_name(user_id) == self.test_username
+            assert magpie_handler.get_user_name_from_user_id.call_count == 2
+
+            # The user name is requested again after the user is deleted
+            filesystem_handler.user_deleted(self.test_username)
+            assert filesystem_handler._resolve_user_name(user_id) == self.test_username
+            assert magpie_handler.get_user_name_from_user_id.call_count == 3
+
     def test_public_wps_output_deleted(self):
         """
         Tests deleting a public wps output path.
@@ -337,6 +414,51 @@ class TestFileSystemBasic(BaseTestFileSystem):
         assert not os.path.exists(old_root_file)
         assert not os.path.exists(old_subdir)
 
+    def test_resync_existing_hardlinks(self):
+        """
+        Tests that the resync operation keeps the existing hardlinks of the source files, while still removing the
+        other paths of the linked folder.
+        """
+        load_dotenv(CURR_DIR / "../docker/.env.example")
+        app = self.get_test_app({
+            "handlers": {
+                "Magpie": {
+                    "active": True,
+                    "url": os.getenv("COWBIRD_TEST_MAGPIE_URL"),
+                    "admin_user": os.getenv("MAGPIE_ADMIN_USER"),
+                    "admin_password": os.getenv("MAGPIE_ADMIN_PASSWORD")},
+                "FileSystem": {
+                    "active": True,
+                    "workspace_dir": self.workspace_dir,
+                    "jupyterhub_user_data_dir": self.jupyterhub_user_data_dir,
+                    "wps_outputs_dir": self.wps_outputs_dir}}})
+
+        filesystem_handler = HandlerFactory().get_handler("FileSystem")
+
+        # Create a new test wps output file, and its hardlink with a first resync
+        output_subpath = "weaver/test_output.txt"
+        output_file = os.path.join(self.wps_outputs_dir, output_subpath)
+        os.makedirs(os.path.dirname(output_file))
+        Path(output_file).touch()
+        hardlink_path = os.path.join(filesystem_handler.get_public_workspace_wps_outputs_dir(), output_subpath)
+        resp = utils.test_request(app, "PUT", "/handlers/FileSystem/resync")
+        assert resp.status_code == 200
+        hardlink_ino = os.stat(hardlink_path).st_ino
+
+        # Create a file in the linked folder that should be removed by the next resync
+        old_file = os.path.join(filesystem_handler.get_public_workspace_wps_outputs_dir(), "weaver/old_file.txt")
+        Path(old_file).touch()
+
+        with patch("cowbird.handlers.impl.filesystem.FileSystem._replace_with_link") as mock_replace_with_link:
+            resp = utils.test_request(app, "PUT", "/handlers/FileSystem/resync")
+
+        # Check that the existing hardlink is kept as is, and that the other file is removed
+        assert resp.status_code == 200
+        mock_replace_with_link.assert_not_called()
+        assert os.stat(hardlink_path).st_ino == hardlink_ino
+        assert os.stat(hardlink_path).st_nlink == 2
+        assert not os.path.exists(old_file)
+
     def test_resync_no_src_wps_outputs(self):
         """
         Tests the resync operation when the source WPS outputs folder does not exist.
@@ -14,6 +14,7 @@ from typing import List, Tuple, cast
 
 import mock
 import pytest
+import requests
 import yaml
 from dotenv import load_dotenv
 from magpie.permissions import Access
@@ -250,6 +251,38 @@ class TestGeoserverRequests(TestGeoserver):
         assert response.status_code == 200
 
 
+class TestGeoserverResponseHandling:
+    @pytest.mark.parametrize(["status_code", "expected_error"], [
+        (400, GeoserverError),
+        (409, GeoserverError),
+        (408, requests.RequestException),
+        (429, requests.RequestException),
+    ])
+    def test_client_error_response(self, status_code: int, expected_error: type) -> None:
+        """
+        Only the client errors that could succeed on a later attempt should raise a retriable ``RequestException``.
+        """
+        geoserver = TestGeoserver.get_geoserver()
+        response = mock.Mock(status_code=status_code, text="")
+        with mock.patch.object(geoserver.session, "post", return_value=response) as post_mock:
+            with pytest.raises(expected_error):
+                geoserver._create_workspace_request(workspace_name="test-client-error")
+        post_mock.assert_called_once()
+
+
+@pytest.mark.parametrize(["filename", "expected_shapefile_name"], [
+    ("/user_workspaces/test-user/shapefile_datastore/test-shapefile.shp", "test-shapefile"),
+    ("/user_workspaces/test-user/shapefile_datastore/test.shapefile.shp", "test.shapefile"),
+])
+def test_shapefile_info(filename: str, expected_shapefile_name: str) -> None:
+    """
+    Only the last extension of the file should be removed to find the shapefile name.
+    """
+    workspace_name, shapefile_name = Geoserver._get_shapefile_info(filename)
+    assert workspace_name == "test-user"
+    assert shapefile_name == expected_shapefile_name
+
+
 # pylint: disable=W0201
 @pytest.mark.geoserver
 @pytest.mark.magpie
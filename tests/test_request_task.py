@@ -14,14 +14,14 @@ import unittest
 from abc import ABC
 from datetime import datetime
 from time import sleep
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from celery import chain, shared_task
 from celery.states import FAILURE, SUCCESS
 from requests.exceptions import RequestException
 
-from cowbird.handlers.impl.geoserver import Geoserver
+from cowbird.handlers.impl.geoserver import Geoserver, GeoserverError, create_workspace_and_datastore
 from cowbird.request_task import AbortException, RequestTask
 from tests import utils
 from tests.utils import MockMagpieHandler
@@ -126,6 +126,35 @@ class TestRequestTask(unittest.TestCase):
         create_workspace_mock.assert_called_with(test_user_name)
         create_datastore_mock.assert_called_with(test_user_name)
 
+    @pytest.mark.geoserver
+    @patch("cowbird.handlers.impl.geoserver.Geoserver.create_datastore")
+    @patch("cowbird.handlers.impl.geoserver.Geoserver.create_workspace")
+    def test_geoserver_create_workspace_and_datastore(self, create_workspace_mock, create_datastore_mock):
+        test_user_name = "test_user"
+
+        # initialize geoserver instance
+        Geoserver.get_instance()
+
+        # a single task should create both the workspace and the datastore
+        task = create_workspace_and_datastore.delay(test_user_name)
+        task.get(timeout=5)
+        assert task.status == SUCCESS
+        create_workspace_mock.assert_called_once_with(test_user_name)
+        create_datastore_mock.assert_called_once_with(test_user_name)
+
+    @pytest.mark.geoserver
+    def test_geoserver_client_error_not_retried(self):
+        test_user_name = "test_user"
+        geoserver = Geoserver.get_instance()
+
+        # a conflict would happen again on each retry, so the task should fail on the first attempt
+        with patch.object(geoserver.session, "post", return_value=Mock(status_code=409, text="")) as post_mock:
+            task = create_workspace_and_datastore.delay(test_user_name)
+            with pytest.raises(GeoserverError):
+                task.get(timeout=5)
+        assert task.status == FAILURE
+        post_mock.assert_called_once()
+
     @pytest.mark.geoserver
     @patch("cowbird.handlers.impl.geoserver.Geoserver._create_datastore_dir")
     @patch("cowbird.handlers.impl.geoserver.Geoserver._configure_datastore_request")
@@ -196,8 +225,8 @@ class TestRequestTask(unittest.TestCase):
         # initialize geoserver instance
         Geoserver.get_instance()
 
-        # geoserver should call create_workspace and then create_datastore
-        Geoserver.publish_shapefile_task_chain(workspace_name=test_user_name, shapefile_name=shapefile_name)
+        # geoserver should validate and then publish the shapefile
+        Geoserver.publish_shapefile_task(workspace_name=test_user_name, shapefile_name=shapefile_name)
 
         # current implementation doesn't give any handler on which we could wait
         sleep(2)